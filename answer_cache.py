@@ -0,0 +1,125 @@
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+from config import ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_TTL, ANSWER_CACHE_SIMILARITY
+
+class AnswerCache:
+    """Two-layer answer cache keyed by corpus version and query
+
+    An exact layer matches normalised query text; behind it a semantic layer
+    matches query embeddings above a cosine-similarity threshold. Entries
+    expire after a TTL, the least recently used are evicted past the size cap,
+    and entries for an older version of a corpus are dropped as soon as a
+    newer version is seen.
+    """
+    def __init__(self, max_entries=ANSWER_CACHE_MAX_ENTRIES, ttl=ANSWER_CACHE_TTL, threshold=ANSWER_CACHE_SIMILARITY):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self._entries = OrderedDict()  # (corpus, version, normalised query) -> entry
+        self._versions = {}            # corpus -> latest version seen
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.seconds_saved = 0.0
+
+    @staticmethod
+    def normalize_query(query):
+        return " ".join(query.lower().split())
+
+    def _check_version(self, corpus, version):
+        latest = self._versions.get(corpus)
+        if latest is None or version > latest:
+            self._versions[corpus] = version
+            if latest is not None:
+                self._drop(lambda key: key[0] == corpus and key[1] != version)
+
+    def _drop(self, predicate):
+        for key in [key for key in self._entries if predicate(key)]:
+            del self._entries[key]
+
+    def get(self, corpus_key, query, query_vector=None):
+        """Return (entry, "exact" | "semantic") for a cached answer, or (None, None)"""
+        corpus, version = corpus_key
+        now = time.monotonic()
+        with self._lock:
+            self._check_version(corpus, version)
+            self._drop(lambda key: now - self._entries[key]["created"] > self.ttl)
+
+            key = (corpus, version, self.normalize_query(query))
+            entry = self._entries.get(key)
+            kind = "exact" if entry is not None else None
+            if entry is None and query_vector is not None:
+                candidates = [k for k in self._entries if k[:2] == (corpus, version)]
+                if candidates:
+                    vectors = np.stack([self._entries[k]["vector"] for k in candidates])
+                    scores = vectors @ np.asarray(query_vector, dtype=np.float32)
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.threshold:
+                        key, entry, kind = candidates[best], self._entries[candidates[best]], "semantic"
+
+            if entry is None:
+                self.misses += 1
+                return None, None
+            self._entries.move_to_end(key)
+            if kind == "exact":
+                self.exact_hits += 1
+            else:
+                self.semantic_hits += 1
+            self.seconds_saved += entry["latency"]
+            return entry, kind
+
+    def put(self, corpus_key, query, query_vector, answer, context, metrics, latency):
+        """Store an answer produced for a query against a corpus version"""
+        corpus, version = corpus_key
+        with self._lock:
+            self._check_version(corpus, version)
+            if self._versions[corpus] != version:
+                return
+            key = (corpus, version, self.normalize_query(query))
+            self._entries[key] = {
+                "vector": np.asarray(query_vector, dtype=np.float32),
+                "answer": answer,
+                "context": context,
+                "metrics": metrics,
+                "latency": latency,
+                "created": time.monotonic()
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, corpus=None):
+        """Drop every entry, or only those for one corpus
+
+        The latest version seen is forgotten too, so a recreated corpus whose
+        version count starts again is cached from its first version.
+        """
+        with self._lock:
+            if corpus is None:
+                self._entries.clear()
+                self._versions.clear()
+            else:
+                self._drop(lambda key: key[0] == corpus)
+                self._versions.pop(corpus, None)
+
+    def stats(self):
+        """Return hit counters, hit rate and the generation time saved"""
+        hits = self.exact_hits + self.semantic_hits
+        lookups = hits + self.misses
+        return {
+            'exact_hits': self.exact_hits,
+            'semantic_hits': self.semantic_hits,
+            'misses': self.misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'seconds_saved': self.seconds_saved,
+            'entries': len(self._entries)
+        }
+
+_cache = AnswerCache()
+
+def get_answer_cache():
+    """Return the process-wide answer cache"""
+    return _cache
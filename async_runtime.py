@@ -0,0 +1,28 @@
+import asyncio
+import threading
+
+_loop = None
+_lock = threading.Lock()
+
+def get_loop():
+    """Return the process-wide background event loop, starting it on first use
+
+    Long-lived async resources such as pooled HTTP clients are bound to one
+    loop, so they live here rather than in a fresh asyncio.run per rerun.
+    """
+    global _loop
+    with _lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="askit-async", daemon=True)
+            thread.start()
+            _loop = loop
+        return _loop
+
+def run(coro, timeout=None):
+    """Run a coroutine on the background loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result(timeout)
+
+async def run_async(coro):
+    """Await a coroutine on the background loop from any other event loop"""
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, get_loop()))
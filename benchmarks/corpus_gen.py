@@ -0,0 +1,117 @@
+"""Synthetic PDF, DOCX, TXT and image corpora for offline benchmarks"""
+import random
+from io import BytesIO
+from extraction import NamedUpload
+
+WORDS = (
+    "system retrieval vector index latency throughput document question answer model embedding "
+    "context chunk corpus query page report revenue quarter growth policy customer product market "
+    "analysis result method evaluation baseline performance memory cache network storage batch"
+).split()
+
+def paragraph(rng, words=80):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+def page_text(rng, paragraphs=4):
+    return "\n\n".join(paragraph(rng) for _ in range(paragraphs))
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def make_pdf(pages):
+    """Build a minimal PDF with one text page per entry in `pages`"""
+    objects = []
+    page_ids = []
+    font_id = 3
+    objects.append(None)  # 1: catalog, filled below
+    objects.append(None)  # 2: page tree, filled below
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for text in pages:
+        lines = []
+        for para in text.split("\n\n"):
+            words, line = para.split(), []
+            for word in words:
+                line.append(word)
+                if len(" ".join(line)) > 90:
+                    lines.append(" ".join(line))
+                    line = []
+            if line:
+                lines.append(" ".join(line))
+            lines.append("")
+        stream = "BT /F1 9 Tf 40 800 Td 11 TL " + " ".join(f"({_pdf_escape(l)}) '" for l in lines) + " ET"
+        content = stream.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (font_id, content_id)
+        )
+        page_ids.append(len(objects))
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (" ".join(f"{i} 0 R" for i in page_ids).encode(), len(page_ids))
+
+    out = BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+def make_docx(pages):
+    from docx import Document
+    doc = Document()
+    for text in pages:
+        for para in text.split("\n\n"):
+            doc.add_paragraph(para)
+    out = BytesIO()
+    doc.save(out)
+    return out.getvalue()
+
+def make_image(text, size=(1700, 2200)):
+    from PIL import Image, ImageDraw
+    image = Image.new("L", size, color=255)
+    draw = ImageDraw.Draw(image)
+    y = 40
+    for para in text.split("\n\n"):
+        words, line = para.split(), []
+        for word in words:
+            line.append(word)
+            if len(" ".join(line)) > 70:
+                draw.text((40, y), " ".join(line), fill=0)
+                y += 22
+                line = []
+        if line:
+            draw.text((40, y), " ".join(line), fill=0)
+            y += 22
+        y += 22
+    out = BytesIO()
+    image.save(out, format="PNG")
+    return out.getvalue()
+
+def generate(kind, files, pages_per_file, seed=0):
+    """Return a list of NamedUpload uploads of the given kind"""
+    rng = random.Random(seed)
+    uploads = []
+    for i in range(files):
+        pages = [page_text(rng) for _ in range(pages_per_file)]
+        if kind == "PDF":
+            uploads.append(NamedUpload(make_pdf(pages), f"synthetic-{i}.pdf"))
+        elif kind == "DOCX":
+            uploads.append(NamedUpload(make_docx(pages), f"synthetic-{i}.docx"))
+        elif kind == "TXT":
+            uploads.append(NamedUpload("\n\n".join(pages).encode("utf-8"), f"synthetic-{i}.txt"))
+        elif kind == "Image":
+            uploads.extend(NamedUpload(make_image(page), f"synthetic-{i}-{p}.png") for p, page in enumerate(pages))
+        else:
+            raise ValueError(f"Unsupported corpus kind: {kind}")
+    return uploads
+
+def questions(count, seed=1):
+    rng = random.Random(seed)
+    return [f"What does the report say about {rng.choice(WORDS)} and {rng.choice(WORDS)}?" for _ in range(count)]
@@ -0,0 +1,39 @@
+"""Deterministic feature-hashing embeddings that need no model download"""
+import re
+import zlib
+import numpy as np
+
+_TOKEN = re.compile(r"\w+")
+
+class HashingEncoder:
+    """Minimal stand-in for a SentenceTransformer client"""
+    def __init__(self, dimension=768):
+        self.dimension = dimension
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, show_progress_bar=False, normalize_embeddings=False, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in _TOKEN.findall(text.lower()):
+                h = zlib.crc32(token.encode("utf-8"))
+                matrix[row, h % self.dimension] += 1.0 if h & 0x80000000 else -1.0
+        if normalize_embeddings:
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix /= np.where(norms == 0, 1, norms)
+        return matrix[0] if single else matrix
+
+class HashingEmbeddings:
+    """Embeddings object with the surface the project uses from HuggingFaceEmbeddings"""
+    def __init__(self, dimension=768):
+        self.client = HashingEncoder(dimension)
+        self.encode_kwargs = {'normalize_embeddings': True}
+
+    def embed_documents(self, texts):
+        return self.client.encode(texts, **self.encode_kwargs).tolist()
+
+    def embed_query(self, text):
+        return self.client.encode(text, **self.encode_kwargs).tolist()
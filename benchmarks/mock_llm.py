@@ -0,0 +1,96 @@
+"""Local OpenAI-compatible chat completions server for offline benchmarks"""
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        server = self.server
+        server.requests += 1
+        if server.rate_limited < server.rate_limit:
+            server.rate_limited += 1
+            self._rate_limit()
+            return
+        time.sleep(server.first_token_delay)
+        tokens = [f"token{i} " for i in range(server.tokens)]
+        if body.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            # OpenRouter sends SSE comments while the model is still queued
+            self._chunk(b": PROCESSING\n\n")
+            for token in tokens:
+                event = {"choices": [{"index": 0, "delta": {"content": token}}]}
+                self._chunk(f"data: {json.dumps(event)}\n\n".encode())
+                time.sleep(server.token_delay)
+            self._chunk(b"data: [DONE]\n\n")
+            self._chunk(b"")
+        else:
+            time.sleep(server.token_delay * len(tokens))
+            payload = json.dumps({
+                "id": "mock",
+                "object": "chat.completion",
+                "model": body.get("model", "mock"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}, "finish_reason": "stop"}]
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    def _rate_limit(self):
+        payload = b'{"error": {"code": 429, "message": "Rate limit exceeded"}}'
+        self.send_response(429)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Retry-After", str(self.server.retry_after))
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _chunk(self, data):
+        self.wfile.write(b"%x\r\n" % len(data) + data + b"\r\n")
+        self.wfile.flush()
+
+class MockLLMServer:
+    """Serve /chat/completions on localhost with fixed, configurable latency
+
+    The first `rate_limit` requests are answered with a 429 carrying a
+    Retry-After of `retry_after` seconds.
+    """
+    def __init__(self, tokens=50, first_token_delay=0.05, token_delay=0.002, port=0, rate_limit=0, retry_after=1):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.tokens = tokens
+        self.httpd.first_token_delay = first_token_delay
+        self.httpd.token_delay = token_delay
+        self.httpd.requests = 0
+        self.httpd.rate_limit = rate_limit
+        self.httpd.rate_limited = 0
+        self.httpd.retry_after = retry_after
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
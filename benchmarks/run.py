@@ -0,0 +1,183 @@
+"""Offline end-to-end benchmark for ingestion and question answering
+
+Generates synthetic corpora, ingests them through process_input, asks
+questions through answer_question/stream_answer against a local mock
+OpenAI-compatible server, and writes per-stage throughput and latency
+percentiles to a JSON file that can be diffed between releases.
+
+    python -m benchmarks.run --kinds PDF DOCX TXT Image --files 4 --pages 25 --queries 50
+
+By default a feature-hashing embedder is used so nothing is downloaded;
+pass --model with a locally cached sentence-transformers model to measure
+the real embedding cost.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+
+def percentiles(samples):
+    """Summarise latency samples (seconds) as count, mean and p50/p95/p99"""
+    if not samples:
+        return {'count': 0, 'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+    ordered = sorted(samples)
+    def pick(p):
+        return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+    return {
+        'count': len(ordered),
+        'mean': sum(ordered) / len(ordered),
+        'p50': pick(0.50),
+        'p95': pick(0.95),
+        'p99': pick(0.99)
+    }
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def throughput(count, seconds):
+    return {'count': count, 'seconds': seconds, 'per_second': count / seconds if seconds > 0 else 0.0}
+
+def rewind(uploads):
+    for upload in uploads:
+        upload.seek(0)
+    return uploads
+
+def bench_kind(kind, args):
+    from benchmarks.corpus_gen import generate, questions
+    from extraction import extract_pages
+    from chunking import chunk_pages
+    from embeddings import encode_batch
+    from document_qa import process_input, answer_question, stream_answer
+    from corpus_store import get_corpus_store
+
+    uploads = generate(kind, args.files, args.pages, seed=args.seed)
+    result = {'files': len(uploads), 'bytes': sum(len(u.getvalue()) for u in uploads)}
+
+    pages, seconds = timed(lambda: list(extract_pages(kind, rewind(uploads))))
+    result['extract'] = throughput(len(pages), seconds)
+
+    chunks, seconds = timed(lambda: list(chunk_pages(pages)))
+    result['chunk'] = throughput(len(chunks), seconds)
+
+    texts = [doc.page_content for _, doc in chunks]
+    def embed_uncached():
+        for i in range(0, len(texts), args.batch_size):
+            encode_batch(texts[i:i + args.batch_size])
+    _, seconds = timed(embed_uncached)
+    result['embed'] = throughput(len(texts), seconds)
+
+    # The first ingest misses the embedding cache; the second embeds the same
+    # files into a fresh corpus, so it measures a warm cache rather than skips
+    name = f"bench-{kind.lower()}"
+    for label, corpus_name in (('ingest_cold', name), ('ingest_warm', f"{name}-warm")):
+        (stats, _), seconds = timed(process_input, kind, rewind(uploads), corpus_name)
+        result[label] = {**throughput(len(texts), seconds), 'stats': stats}
+
+    # Re-uploading into the same corpus skips unchanged files before extraction
+    (stats, _), seconds = timed(process_input, kind, rewind(uploads), name)
+    result['reupload'] = {'seconds': seconds, 'skipped_uploads': stats['skipped_uploads']}
+
+    vectorstore, seconds = timed(lambda: get_corpus_store().open(name).vectorstore)
+    result['load'] = {'seconds': seconds}
+
+    search_latencies, answer_latencies, ttfts, stream_latencies = [], [], [], []
+    for question in questions(args.queries, seed=args.seed + 1):
+        _, seconds = timed(vectorstore.similarity_search, question, k=4)
+        search_latencies.append(seconds)
+        _, seconds = timed(answer_question, vectorstore, question, "bench-key")
+        answer_latencies.append(seconds)
+        stream = stream_answer(vectorstore, question, "bench-key")
+        for _ in stream:
+            pass
+        ttfts.append(stream.time_to_first_token)
+        stream_latencies.append(stream.latency)
+    result['search'] = percentiles(search_latencies)
+    result['answer'] = percentiles(answer_latencies)
+    result['stream_first_token'] = percentiles(ttfts)
+    result['stream_total'] = percentiles(stream_latencies)
+    return result
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline ingestion and query benchmark")
+    parser.add_argument("--kinds", nargs="+", default=["PDF", "DOCX", "TXT", "Image"], choices=["PDF", "DOCX", "TXT", "Image"])
+    parser.add_argument("--files", type=int, default=4, help="Files per corpus (images: pages become separate files)")
+    parser.add_argument("--pages", type=int, default=25, help="Pages per file")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--model", default=None, help="Locally cached sentence-transformers model (default: hashing embedder)")
+    parser.add_argument("--llm-first-token", type=float, default=0.05, help="Mock LLM delay before the first token (s)")
+    parser.add_argument("--llm-token-delay", type=float, default=0.002, help="Mock LLM delay between tokens (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_results.json")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    from benchmarks.mock_llm import MockLLMServer
+
+    workdir = tempfile.mkdtemp(prefix="askit-bench-")
+    with MockLLMServer(first_token_delay=args.llm_first_token, token_delay=args.llm_token_delay) as server:
+        # Configuration is read at import time, so point everything at local
+        # resources before the project modules are imported
+        os.environ.update({
+            "OPENROUTER_BASE_URL": server.base_url,
+            "CORPUS_DIR": os.path.join(workdir, "corpora"),
+            "EMBEDDING_CACHE_DIR": os.path.join(workdir, "embeddings"),
+            "OCR_CACHE_DIR": os.path.join(workdir, "ocr"),
+            "LINK_CACHE_DIR": os.path.join(workdir, "links"),
+            "HF_HUB_OFFLINE": "1",
+            "TRANSFORMERS_OFFLINE": "1",
+        })
+        if args.model:
+            os.environ["EMBEDDING_MODEL"] = args.model
+        else:
+            from benchmarks.hashing_embeddings import HashingEmbeddings
+            from embeddings import get_registry
+            from config import EMBEDDING_MODEL
+            get_registry().register(EMBEDDING_MODEL, HashingEmbeddings())
+
+        from image_processor import TesseractManager
+        results = {}
+        for kind in args.kinds:
+            if kind == "Image" and not TesseractManager().is_available():
+                results[kind] = {'skipped': "Tesseract OCR not available"}
+                continue
+            print(f"benchmarking {kind}...", file=sys.stderr)
+            results[kind] = bench_kind(kind, args)
+
+        from llm_scheduler import get_scheduler
+        from startup import measure_cold_import
+        report = {
+            'meta': {
+                'timestamp': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'commit': git_commit(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpus': os.cpu_count(),
+                'embedding_model': args.model or "hashing",
+                'args': vars(args),
+                'llm_requests': server.requests,
+                'scheduler': get_scheduler("bench-key").stats(),
+                'cold_import_seconds': {module: measure_cold_import(module) for module in ("document_qa", "youtube_qa")}
+            },
+            'results': results
+        }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"wrote {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
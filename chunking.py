@@ -0,0 +1,31 @@
+from config import CHUNK_SIZE, CHUNK_OVERLAP
+
+def chunk_pages(pages, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP):
+    """Split a stream of ExtractedPage pieces into (source, Document) chunks
+
+    Each page is split on its own, so chunks never cross a file or page
+    boundary. Every chunk carries its source, page number and the character
+    offsets of the chunk within that page.
+    """
+    from langchain.text_splitter import CharacterTextSplitter
+    from langchain_core.documents import Document
+    text_splitter = CharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    for page in pages:
+        search_from = 0
+        for chunk in text_splitter.split_text(page.text):
+            start = page.text.find(chunk, search_from)
+            if start < 0:
+                # The splitter normalised separators; fall back to an unanchored search
+                start = page.text.find(chunk)
+            if start >= 0:
+                # The next chunk starts after this one's start, possibly inside its overlap
+                search_from = start + 1
+            yield page.source, Document(
+                page_content=chunk,
+                metadata={
+                    "source": page.source,
+                    "page": page.page,
+                    "start_index": start,
+                    "end_index": start + len(chunk) if start >= 0 else -1
+                }
+            )
@@ -14,4 +14,96 @@ YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY", "AIzaSyC3Pw3KxmnBm4HxRTeuPRXQektK
 CURRENT_USER = os.getenv("USER", "shivasaijuluri")
 
 # Model configuration
-DEFAULT_MODEL = "mistralai/mistral-7b-instruct:free"
\ No newline at end of file
+DEFAULT_MODEL = "mistralai/mistral-7b-instruct:free"
+# Embedding configuration
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-mpnet-base-v2")
+EMBEDDING_DEVICE = os.getenv("EMBEDDING_DEVICE", "cpu")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))  # 0 keeps the torch default
+
+# Embedding cache configuration
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", os.path.join(".cache", "embeddings"))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "100000"))
+
+# Corpus storage configuration
+CORPUS_DIR = os.getenv("CORPUS_DIR", "corpora")
+DEFAULT_CORPUS = "default"
+CORPUS_MAX_SEGMENTS = int(os.getenv("CORPUS_MAX_SEGMENTS", "32"))
+CORPUS_MEMORY_BUDGET_MB = int(os.getenv("CORPUS_MEMORY_BUDGET_MB", "2048"))  # loaded corpora beyond this are unloaded, LRU first
+
+# Document extraction configuration
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(min(os.cpu_count() or 1, 8))))
+EXTRACTION_PAGE_CHARS = int(os.getenv("EXTRACTION_PAGE_CHARS", "4000"))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+
+# Chunking configuration
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "100"))
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+
+# Vector index configuration
+INDEX_MODE = os.getenv("INDEX_MODE", "auto")  # auto, flat, ivf, hnsw or ivfpq
+INDEX_TRAIN_SAMPLE = int(os.getenv("INDEX_TRAIN_SAMPLE", "50000"))
+INDEX_NPROBE = int(os.getenv("INDEX_NPROBE", "16"))
+INDEX_EF_SEARCH = int(os.getenv("INDEX_EF_SEARCH", "64"))
+
+# Answer cache configuration
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))  # seconds
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))  # cosine threshold
+
+# Link ingestion configuration
+LINK_CACHE_DIR = os.getenv("LINK_CACHE_DIR", os.path.join(".cache", "links"))
+LINK_CONCURRENCY = int(os.getenv("LINK_CONCURRENCY", "8"))
+LINK_PER_HOST_CONCURRENCY = int(os.getenv("LINK_PER_HOST_CONCURRENCY", "2"))
+LINK_HOST_DELAY = float(os.getenv("LINK_HOST_DELAY", "0.25"))  # seconds between requests to one host
+LINK_TIMEOUT = float(os.getenv("LINK_TIMEOUT", "20"))
+
+# YouTube metadata configuration
+YOUTUBE_METADATA_TTL = float(os.getenv("YOUTUBE_METADATA_TTL", "86400"))  # seconds
+YOUTUBE_BATCH_WINDOW = float(os.getenv("YOUTUBE_BATCH_WINDOW", "0.02"))  # seconds to gather ids into one call
+
+# LLM request scheduling
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_MAX_CONCURRENCY_PER_MODEL = int(os.getenv("LLM_MAX_CONCURRENCY_PER_MODEL", "8"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+
+# OCR configuration
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 1)))
+OCR_MAX_SIDE = int(os.getenv("OCR_MAX_SIDE", "3500"))  # pixels; larger scans are downscaled and binarized
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", os.path.join(".cache", "ocr"))
+
+# Tracing configuration
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "0") == "1"
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")  # *.json for JSON lines, anything else for OpenMetrics
+
+# HTTP service configuration
+SERVICE_HOST = os.getenv("SERVICE_HOST", "0.0.0.0")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8080"))
+SERVICE_BATCH_WINDOW = float(os.getenv("SERVICE_BATCH_WINDOW", "0.005"))  # seconds to gather concurrent query embeddings
+SERVICE_MAX_BATCH = int(os.getenv("SERVICE_MAX_BATCH", "64"))
+SERVICE_MAX_UPLOAD_MB = int(os.getenv("SERVICE_MAX_UPLOAD_MB", "200"))
+
+# Retrieval configuration
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "3"))  # chunks sent to the LLM
+RETRIEVAL_CANDIDATES = int(os.getenv("RETRIEVAL_CANDIDATES", "20"))  # per ranking before fusion
+RRF_K = int(os.getenv("RRF_K", "60"))
+BM25_K1 = float(os.getenv("BM25_K1", "1.5"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+
+# Start-up configuration
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "1") == "1"  # import heavy modules and load the model in the background
+NLTK_DATA_DIR = os.getenv("NLTK_DATA_DIR", "nltk_data")  # bundled NLTK data; nothing is downloaded at runtime
+
+# Duplicate chunk configuration
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "1") == "1"
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.9"))  # estimated Jaccard similarity of word shingles
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "64"))
+DEDUP_BANDS = int(os.getenv("DEDUP_BANDS", "16"))
+DEDUP_SHINGLE = int(os.getenv("DEDUP_SHINGLE", "3"))  # words per shingle
+
+# Prompt context configuration
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1200"))  # tokens of retrieved context per prompt
+CONTEXT_MIN_TRUNCATED_TOKENS = int(os.getenv("CONTEXT_MIN_TRUNCATED_TOKENS", "64"))  # smaller leftovers are dropped, not truncated
+CONTEXT_TOKENIZER = os.getenv("CONTEXT_TOKENIZER", "cl100k_base")  # tiktoken encoding; falls back to ~4 chars per token
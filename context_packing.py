@@ -0,0 +1,114 @@
+import math
+from functools import lru_cache
+from config import CONTEXT_TOKEN_BUDGET, CONTEXT_MIN_TRUNCATED_TOKENS, CONTEXT_TOKENIZER
+
+_MAX_MERGE_GAP = 2  # characters; the splitter drops a paragraph break between adjacent chunks
+
+@lru_cache(maxsize=None)
+def _encoding():
+    """The tiktoken encoding, or None to use the character heuristic
+
+    tiktoken fetches encodings on first use, so offline hosts without a
+    cached copy fall back rather than fail.
+    """
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(CONTEXT_TOKENIZER)
+    except Exception:
+        return None
+
+def tokenizer_name():
+    return CONTEXT_TOKENIZER if _encoding() is not None else "heuristic"
+
+def count_tokens(text):
+    """Number of tokens in text"""
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / 4)
+
+def truncate_tokens(text, max_tokens):
+    """Cut text to at most max_tokens, at a word boundary where possible"""
+    encoding = _encoding()
+    if encoding is not None:
+        text = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+    else:
+        text = text[:max_tokens * 4]
+    cut = text.rfind(" ")
+    return text[:cut] if cut > len(text) // 2 else text
+
+def merge_chunks(docs):
+    """Merge overlapping or adjacent chunks of the same source page
+
+    docs are in relevance order. Returns (text, best rank, chunk count)
+    blocks ordered by the rank of their most relevant chunk. Chunks
+    without offsets are kept as they are.
+    """
+    spans = {}
+    blocks = []
+    for rank, doc in enumerate(docs):
+        meta = doc.metadata
+        start, end = meta.get("start_index", -1), meta.get("end_index", -1)
+        if start is None or start < 0 or end is None or end < 0:
+            blocks.append([doc.page_content, rank, 1, None])
+            continue
+        spans.setdefault((meta.get("source"), meta.get("page")), []).append((start, end, rank, doc.page_content))
+    for page_spans in spans.values():
+        page_spans.sort()
+        current = None
+        for start, end, rank, text in page_spans:
+            if current is not None and start <= current[3] + _MAX_MERGE_GAP:
+                if end > current[3]:
+                    # Skip the part of this chunk that is already in the block
+                    overlap = current[3] - start
+                    current[0] += text[overlap:] if overlap >= 0 else "\n\n" + text
+                    current[3] = end
+                current[1] = min(current[1], rank)
+                current[2] += 1
+            else:
+                current = [text, rank, 1, end]
+                blocks.append(current)
+    blocks.sort(key=lambda block: block[1])
+    return [(text, rank, count) for text, rank, count, _ in blocks]
+
+def pack_context(docs, budget=CONTEXT_TOKEN_BUDGET, min_truncated=CONTEXT_MIN_TRUNCATED_TOKENS):
+    """Assemble retrieved chunks into a context that fits a token budget
+
+    Overlapping chunks are merged so shared text is sent once, then blocks
+    are added most relevant first. A block that does not fit is truncated
+    if at least min_truncated tokens remain, otherwise dropped. Returns the
+    context text and a report of the decisions.
+    """
+    blocks = merge_chunks(docs)
+    parts, decisions = [], []
+    remaining = budget
+    used = 0
+    for text, rank, count in blocks:
+        tokens = count_tokens(text)
+        if tokens <= remaining:
+            parts.append(text)
+            remaining -= tokens
+            used += tokens
+            decisions.append({'rank': rank, 'chunks': count, 'tokens': tokens, 'action': "included"})
+        elif remaining >= min_truncated:
+            text = truncate_tokens(text, remaining)
+            kept = count_tokens(text)
+            parts.append(text)
+            # Re-encoding a cut can differ by a token, so never go below zero
+            remaining = max(remaining - kept, 0)
+            used += kept
+            decisions.append({'rank': rank, 'chunks': count, 'tokens': tokens, 'kept': kept, 'action': "truncated"})
+        else:
+            decisions.append({'rank': rank, 'chunks': count, 'tokens': tokens, 'action': "dropped"})
+    report = {
+        'tokenizer': tokenizer_name(),
+        'budget': budget,
+        'context_tokens': used,
+        'chunks': len(docs),
+        'blocks': len(blocks),
+        'merged': len(docs) - len(blocks),
+        'truncated': sum(d['action'] == "truncated" for d in decisions),
+        'dropped': sum(d['action'] == "dropped" for d in decisions),
+        'decisions': decisions
+    }
+    return "\n\n".join(parts), report
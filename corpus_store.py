@@ -0,0 +1,591 @@
+import os
+import re
+import json
+import uuid
+import pickle
+import shutil
+import threading
+from collections import OrderedDict
+import numpy as np
+from embeddings import get_registry, embed_in_batches
+from answer_cache import get_answer_cache
+from tracing import span
+from lexical_index import BM25Index, term_counts, segment_terms
+from dedup import ChunkDeduplicator
+from vector_index import (
+    build_index, train_index, resolve_index_mode, set_search_params, index_contents, remove_from_index
+)
+from config import (
+    CORPUS_DIR, CORPUS_MAX_SEGMENTS, CORPUS_MEMORY_BUDGET_MB, DEDUP_ENABLED, EMBEDDING_BATCH_SIZE, EMBEDDING_MODEL, INDEX_MODE, INDEX_NPROBE, INDEX_EF_SEARCH
+)
+
+# Corpus names are used as directory names under CORPUS_DIR as they are
+CORPUS_NAME = re.compile(r'[0-9A-Za-z][0-9A-Za-z_.-]{0,63}')
+
+def is_valid_corpus_name(name):
+    """Whether a name can be used for a corpus: 1-64 letters, digits, '_', '.' or '-', not starting with a symbol"""
+    return isinstance(name, str) and CORPUS_NAME.fullmatch(name) is not None
+
+class Corpus:
+    """A named vector store persisted on disk as a list of immutable-size segments
+
+    Each upload becomes a new segment (a FAISS index plus its docstore and id
+    map), so adding documents costs time proportional to the upload. Opening a
+    corpus only reads its manifest; segment indexes are loaded on first use,
+    memory-mapped where the index type supports it.
+
+    A Corpus is a lightweight handle: its indexes and docstore can be unloaded
+    at any time (see CorpusStore) and are reloaded on the next access.
+    """
+    def __init__(self, name, directory, store=None):
+        self.name = name
+        self._store = store
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        self._lock = threading.RLock()
+        self._segments = {}      # segment name -> loaded faiss index
+        self._mmapped = set()    # segments loaded read-only through a memory map
+        self._vectorstore = None
+        self._lexical = None     # BM25 index over the same vector ids, built with the vectorstore
+        self._search_params = {"nprobe": INDEX_NPROBE, "ef_search": INDEX_EF_SEARCH}
+        self._load_manifest()
+
+    def _load_manifest(self):
+        if os.path.isfile(self.manifest_path):
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+            # Corpora saved before index modes existed hold unnormalised L2 vectors
+            self.manifest.setdefault("metric", "l2")
+            self.manifest.setdefault("index_mode", "flat")
+            self.manifest.setdefault("resolved_mode", "flat")
+            self.manifest.setdefault("vectors", None)
+            self.manifest.setdefault("hashes", {})
+        else:
+            self.manifest = {
+                "name": self.name,
+                "model": EMBEDDING_MODEL,
+                "dimension": None,
+                "metric": "ip",
+                "index_mode": INDEX_MODE,
+                "resolved_mode": "flat",
+                "vectors": 0,
+                "version": 0,
+                "next_id": 0,
+                "next_segment": 0,
+                "segments": [],
+                "documents": {},  # document key -> segment name
+                "hashes": {}      # document key -> content hash of the upload it came from
+            }
+
+    def _save_manifest(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    @property
+    def version(self):
+        """Monotonic counter bumped on every change to the corpus contents"""
+        return self.manifest["version"]
+
+    @property
+    def documents(self):
+        """Keys of the documents currently stored in the corpus"""
+        return sorted(self.manifest["documents"])
+
+    def content_hash(self, key):
+        """Content hash recorded when the document was added, if any"""
+        return self.manifest["hashes"].get(key)
+
+    @property
+    def dimension(self):
+        if self.manifest["dimension"] is None:
+            self.manifest["dimension"] = get_registry().dimension(self.manifest["model"])
+        return self.manifest["dimension"]
+
+    def _segment_path(self, segment, suffix):
+        return os.path.join(self.directory, f"{segment}.{suffix}")
+
+    def _template_path(self):
+        return os.path.join(self.directory, "trained.faiss")
+
+    def _new_index(self):
+        mode = self.manifest["resolved_mode"]
+        if mode in ("ivf", "ivfpq"):
+            # New segments reuse the coarse quantizer trained at the last compaction
+            if os.path.isfile(self._template_path()):
+                import faiss
+                return faiss.read_index(self._template_path())
+            mode = "flat"
+        return build_index(self.dimension, mode, metric=self.manifest["metric"])
+
+    @property
+    def vector_count(self):
+        """Number of vectors stored across all segments"""
+        if self.manifest["vectors"] is None:
+            self.manifest["vectors"] = sum(self._load_segment(segment).ntotal for segment in self.manifest["segments"])
+        return self.manifest["vectors"]
+
+    def vectors(self):
+        """Return (ids, vectors) for every stored chunk"""
+        with self._lock:
+            parts = [index_contents(self._load_segment(segment, writable=True)) for segment in self.manifest["segments"]]
+            if not parts:
+                return np.empty(0, dtype=np.int64), np.empty((0, self.dimension), dtype=np.float32)
+            return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+    def set_search_params(self, nprobe=None, ef_search=None):
+        """Set query-time knobs (IVF nprobe, HNSW efSearch) for this corpus"""
+        with self._lock:
+            if nprobe is not None:
+                self._search_params["nprobe"] = nprobe
+            if ef_search is not None:
+                self._search_params["ef_search"] = ef_search
+            self._refresh_index()
+
+    def _load_segment(self, segment, writable=False):
+        index = self._segments.get(segment)
+        if index is not None and not (writable and segment in self._mmapped):
+            return index
+        import faiss
+        path = self._segment_path(segment, "faiss")
+        if writable:
+            index = faiss.read_index(path)
+            self._mmapped.discard(segment)
+        else:
+            index = faiss.read_index(path, faiss.IO_FLAG_MMAP)
+            self._mmapped.add(segment)
+        self._segments[segment] = index
+        return index
+
+    def _load_segment_data(self, segment):
+        with open(self._segment_path(segment, "pkl"), "rb") as f:
+            return pickle.load(f)
+
+    def _write_segment(self, segment, index, data):
+        import faiss
+        os.makedirs(self.directory, exist_ok=True)
+        faiss.write_index(index, self._segment_path(segment, "faiss"))
+        tmp_path = self._segment_path(segment, "pkl.tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._segment_path(segment, "pkl"))
+
+    def _delete_segment(self, segment):
+        for suffix in ("faiss", "pkl"):
+            path = self._segment_path(segment, suffix)
+            if os.path.exists(path):
+                os.remove(path)
+        self._segments.pop(segment, None)
+        self._mmapped.discard(segment)
+        self.manifest["segments"].remove(segment)
+
+    def _file_size(self, segment, suffix):
+        try:
+            return os.path.getsize(self._segment_path(segment, suffix))
+        except OSError:
+            return 0
+
+    @property
+    def is_loaded(self):
+        return bool(self._segments) or self._vectorstore is not None
+
+    def resident_bytes(self):
+        """Approximate memory held by loaded indexes and the docstore
+
+        Uses the on-disk size of each loaded segment, which tracks its
+        in-memory size closely for both FAISS indexes and pickled docstores.
+        """
+        size = sum(self._file_size(segment, "faiss") for segment in list(self._segments))
+        if self._vectorstore is not None:
+            size += sum(self._file_size(segment, "pkl") for segment in list(self.manifest["segments"]))
+        return size
+
+    def unload(self, blocking=True):
+        """Drop loaded indexes and the docstore; they are reloaded on next use
+
+        Returns False if the corpus is busy and blocking is False.
+        """
+        if not self._lock.acquire(blocking=blocking):
+            return False
+        try:
+            self._segments.clear()
+            self._mmapped.clear()
+            self._vectorstore = None
+            self._lexical = None
+            return True
+        finally:
+            self._lock.release()
+
+    def _touch(self):
+        if self._store is not None:
+            self._store.touch(self)
+
+    def _combined_index(self):
+        segments = self.manifest["segments"]
+        if not segments:
+            return self._new_index()
+        if len(segments) == 1:
+            index = self._load_segment(segments[0])
+        else:
+            import faiss
+            index = faiss.IndexShards(self.dimension, False, False)
+            for segment in segments:
+                index.add_shard(self._load_segment(segment))
+        set_search_params(index, **self._search_params)
+        return index
+
+    @property
+    def vectorstore(self):
+        """LangChain FAISS view over all segments, built on first access
+
+        The store carries the corpus's BM25 index as `lexical_index`.
+        """
+        with self._lock:
+            if self._vectorstore is None:
+                from langchain_community.vectorstores import FAISS
+                from langchain_community.vectorstores.utils import DistanceStrategy
+                from langchain_community.docstore.in_memory import InMemoryDocstore
+                docstore = {}
+                index_to_docstore_id = {}
+                self._lexical = BM25Index()
+                for segment in self.manifest["segments"]:
+                    data = self._load_segment_data(segment)
+                    docstore.update(data["docstore"])
+                    index_to_docstore_id.update(data["index_to_docstore_id"])
+                    self._lexical.add(segment_terms(data))
+                self._vectorstore = FAISS(
+                    embedding_function=get_registry().get(self.manifest["model"]).embed_query,
+                    index=self._combined_index(),
+                    docstore=InMemoryDocstore(docstore),
+                    index_to_docstore_id=index_to_docstore_id,
+                    distance_strategy=(
+                        DistanceStrategy.MAX_INNER_PRODUCT if self.manifest["metric"] == "ip"
+                        else DistanceStrategy.EUCLIDEAN_DISTANCE
+                    ),
+                )
+                self._vectorstore.lexical_index = self._lexical
+                loaded = True
+            else:
+                loaded = False
+            vectorstore = self._vectorstore
+        # Outside our lock: making room may need to take other corpora's locks
+        if loaded:
+            self._touch()
+        return vectorstore
+
+    def _refresh_index(self):
+        if self._vectorstore is not None:
+            self._vectorstore.index = self._combined_index()
+
+    def add_chunks(self, chunks, batch_size=EMBEDDING_BATCH_SIZE, hashes=None, dedup=DEDUP_ENABLED):
+        """Embed (document key, Document) pairs into a new segment
+
+        A key that already exists in the corpus is replaced; its old chunks
+        are removed only after the new segment is written, so a failed
+        ingest leaves the stored document in place. hashes maps
+        document keys to the content hash of their upload, so an unchanged
+        upload can be recognised later. With dedup, chunks that repeat an
+        earlier chunk of the same upload are not embedded; they become
+        references to its vector, listed under the stored chunk's
+        "duplicates" metadata. Returns the ingestion stats from the
+        embedding path.
+        """
+        stats = self._add_chunks(chunks, batch_size, hashes or {}, ChunkDeduplicator() if dedup else None)
+        self._touch()
+        return stats
+
+    def _add_chunks(self, chunks, batch_size, hashes, deduplicator):
+        with self._lock:
+            stats = {}
+            pending = []
+            references = []  # (sequence number of the original chunk, key, duplicate Document)
+            replaced = set()  # keys already stored; removed only once the new segment is on disk
+
+            def texts():
+                for sequence, (key, doc) in enumerate(chunks):
+                    if key in self.manifest["documents"]:
+                        replaced.add(key)
+                    if deduplicator is not None:
+                        with span("dedup"):
+                            original = deduplicator.check(doc.page_content, sequence)
+                        if original is not None:
+                            references.append((original, key, doc))
+                            continue
+                    pending.append((sequence, key, doc))
+                    yield doc.page_content
+
+            segment = f"seg-{self.manifest['next_segment']:06d}"
+            index = self._new_index()
+            data = {"docstore": {}, "index_to_docstore_id": {}, "documents": {}, "terms": {}}
+            vector_ids = {}  # sequence number -> vector id
+            for batch, matrix in embed_in_batches(texts(), batch_size=batch_size, model_name=self.manifest["model"], stats=stats):
+                items = pending[:len(batch)]
+                del pending[:len(batch)]
+                start = self.manifest["next_id"]
+                ids = np.arange(start, start + len(items), dtype=np.int64)
+                self.manifest["next_id"] = start + len(items)
+                with span("index"):
+                    index.add_with_ids(matrix, ids)
+                for vector_id, (sequence, key, doc) in zip(ids.tolist(), items):
+                    doc_id = str(uuid.uuid4())
+                    vector_ids[sequence] = vector_id
+                    data["docstore"][doc_id] = doc
+                    data["index_to_docstore_id"][vector_id] = doc_id
+                    data["documents"].setdefault(key, []).append(vector_id)
+                    data["terms"][vector_id] = term_counts(doc.page_content)
+            self._add_references(data, references, vector_ids)
+            if deduplicator is not None:
+                stats.update(deduplicator.stats())
+
+            if index.ntotal == 0:
+                if replaced:
+                    self.remove_documents(replaced)
+                return stats
+            with span("persist"):
+                self._write_segment(segment, index, data)
+                self._remove_documents(replaced)
+            self._segments[segment] = index
+            self.manifest["vectors"] = self.vector_count + index.ntotal
+            self.manifest["next_segment"] += 1
+            self.manifest["segments"].append(segment)
+            for key in data["documents"]:
+                self.manifest["documents"][key] = segment
+                if key in hashes:
+                    self.manifest["hashes"][key] = hashes[key]
+            self.manifest["version"] += 1
+            self._save_manifest()
+
+            if self._vectorstore is not None:
+                self._vectorstore.docstore.add(data["docstore"])
+                self._vectorstore.index_to_docstore_id.update(data["index_to_docstore_id"])
+                self._lexical.add(data["terms"])
+            if len(self.manifest["segments"]) > CORPUS_MAX_SEGMENTS or self._target_mode() != self.manifest["resolved_mode"]:
+                with span("compact"):
+                    self.compact(force=True)
+            else:
+                self._refresh_index()
+            return stats
+
+    @staticmethod
+    def _add_references(data, references, vector_ids):
+        """Point duplicate chunks at the vector of the chunk they repeat"""
+        for original, key, doc in references:
+            vector_id = vector_ids[original]
+            ids = data["documents"].setdefault(key, [])
+            if vector_id not in ids:
+                ids.append(vector_id)
+            stored = data["docstore"][data["index_to_docstore_id"][vector_id]]
+            stored.metadata.setdefault("duplicates", []).append(
+                {name: doc.metadata.get(name) for name in ("source", "page", "start_index", "end_index")}
+            )
+
+    def remove_documents(self, keys):
+        """Remove documents by key, rewriting only the segments that held them"""
+        with self._lock:
+            if not self._remove_documents(keys):
+                return
+            self.manifest["version"] += 1
+            self._save_manifest()
+            self._refresh_index()
+
+    def _remove_documents(self, keys):
+        """Drop documents from their segments without saving the manifest
+
+        Returns whether anything was removed; the caller bumps the version
+        and saves the manifest once it is consistent.
+        """
+        by_segment = {}
+        for key in keys:
+            segment = self.manifest["documents"].pop(key, None)
+            self.manifest["hashes"].pop(key, None)
+            if segment is not None:
+                by_segment.setdefault(segment, []).append(key)
+        for segment, segment_keys in by_segment.items():
+            data = self._load_segment_data(segment)
+            data["terms"] = segment_terms(data)
+            removed = {i for key in segment_keys for i in data["documents"].pop(key, [])}
+            # Vectors shared with a remaining document (deduplicated chunks) stay
+            shared = removed.intersection(i for remaining in data["documents"].values() for i in remaining)
+            self._drop_references(data, shared, set(segment_keys))
+            ids = sorted(removed - shared)
+            doc_ids = [data["index_to_docstore_id"].pop(i) for i in ids]
+            for doc_id in doc_ids:
+                data["docstore"].pop(doc_id, None)
+            removed_terms = {i: data["terms"].pop(i, {}) for i in ids}
+            if self.manifest["vectors"] is not None:
+                self.manifest["vectors"] -= len(ids)
+            if self._vectorstore is not None:
+                # Nothing to delete when every removed chunk is still shared
+                if doc_ids:
+                    self._vectorstore.docstore.delete(doc_ids)
+                for i in ids:
+                    self._vectorstore.index_to_docstore_id.pop(i, None)
+                self._lexical.remove(removed_terms)
+            if not data["documents"]:
+                self._delete_segment(segment)
+                continue
+            index = remove_from_index(self._load_segment(segment, writable=True), ids)
+            self._segments[segment] = index
+            self._write_segment(segment, index, data)
+        return bool(by_segment)
+
+    def _drop_references(self, data, ids, keys):
+        """Remove duplicate references from removed documents on chunks that stay"""
+        for vector_id in ids:
+            doc_id = data["index_to_docstore_id"][vector_id]
+            docs = [data["docstore"][doc_id]]
+            if self._vectorstore is not None:
+                live = self._vectorstore.docstore.search(doc_id)
+                if not isinstance(live, str):
+                    docs.append(live)
+            for doc in docs:
+                duplicates = [d for d in doc.metadata.get("duplicates", []) if d.get("source") not in keys]
+                if doc.metadata.get("source") in keys and duplicates:
+                    # The chunk now belongs to a remaining document; cite that one
+                    doc.metadata.update(duplicates.pop(0))
+                doc.metadata["duplicates"] = duplicates
+
+    def _target_mode(self):
+        return resolve_index_mode(self.manifest["index_mode"], self.vector_count)
+
+    def compact(self, force=False, mode=None):
+        """Merge all segments into one index of the configured or automatic mode
+
+        IVF backends are trained on a sample of the corpus and the trained,
+        empty index is kept as a template for segments added afterwards.
+        """
+        with self._lock:
+            segments = list(self.manifest["segments"])
+            if not segments or (len(segments) < 2 and not force):
+                return
+            if mode is not None:
+                self.manifest["index_mode"] = mode
+            data = {"docstore": {}, "index_to_docstore_id": {}, "documents": {}, "terms": {}}
+            all_ids, all_vectors = self.vectors()
+            for segment in segments:
+                segment_data = self._load_segment_data(segment)
+                segment_data["terms"] = segment_terms(segment_data)
+                for part in data:
+                    data[part].update(segment_data[part])
+
+            target_mode = self._target_mode()
+            merged = build_index(self.dimension, target_mode, len(all_ids), metric=self.manifest["metric"])
+            train_index(merged, all_vectors)
+            if target_mode in ("ivf", "ivfpq"):
+                import faiss
+                faiss.write_index(merged, self._template_path())
+            elif os.path.exists(self._template_path()):
+                os.remove(self._template_path())
+            if len(all_ids):
+                merged.add_with_ids(all_vectors, all_ids)
+
+            target = f"seg-{self.manifest['next_segment']:06d}"
+            self._write_segment(target, merged, data)
+            self.manifest["next_segment"] += 1
+            for segment in segments:
+                self._delete_segment(segment)
+            self._segments[target] = merged
+            self.manifest["segments"].append(target)
+            self.manifest["documents"] = {key: target for key in data["documents"]}
+            self.manifest["resolved_mode"] = target_mode
+            self.manifest["vectors"] = len(all_ids)
+            self._save_manifest()
+            self._refresh_index()
+
+class CorpusStore:
+    """Process-wide registry of named corpora stored under one directory
+
+    Loaded corpora are kept within a memory budget: once their combined
+    resident size exceeds it, the least recently used ones are unloaded to
+    disk until it fits again. The corpus in use is never unloaded.
+
+    Writes are serialised per corpus within this process only: manifests are
+    cached in memory and never re-read, so exactly one process may write to
+    a given root directory.
+    """
+    def __init__(self, root=CORPUS_DIR, memory_budget=CORPUS_MEMORY_BUDGET_MB * 1024 * 1024):
+        self.root = root
+        self.memory_budget = memory_budget
+        self._corpora = OrderedDict()  # resolved directory -> Corpus, least recently used first
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def _directory(self, name):
+        if not is_valid_corpus_name(name):
+            raise ValueError(f"Invalid corpus name {name!r}: use 1-64 letters, digits, '_', '.' or '-', starting with a letter or digit")
+        return os.path.join(self.root, name)
+
+    def _key(self, name):
+        # Keyed by where the corpus lives, so there is never a second handle
+        # (with its own cached manifest) over the same directory
+        return os.path.realpath(self._directory(name))
+
+    def open(self, name):
+        """Return the corpus with this name, creating an empty one if needed"""
+        key = self._key(name)
+        with self._lock:
+            corpus = self._corpora.get(key)
+            if corpus is None:
+                corpus = Corpus(name, self._directory(name), store=self)
+                self._corpora[key] = corpus
+            self._corpora.move_to_end(key)
+            return corpus
+
+    def touch(self, corpus):
+        """Mark a corpus as just used and unload others if over budget"""
+        with self._lock:
+            key = os.path.realpath(corpus.directory)
+            if self._corpora.get(key) is corpus:
+                self._corpora.move_to_end(key)
+            candidates = [c for c in self._corpora.values() if c is not corpus and c.is_loaded]
+            total = corpus.resident_bytes() + sum(c.resident_bytes() for c in candidates)
+        for candidate in candidates:
+            if total <= self.memory_budget:
+                break
+            size = candidate.resident_bytes()
+            # A corpus busy ingesting or compacting is skipped rather than waited for
+            if candidate.unload(blocking=False):
+                total -= size
+                with self._lock:
+                    self.evictions += 1
+
+    def stats(self):
+        """Resident and evicted corpora against the memory budget"""
+        with self._lock:
+            corpora = list(self._corpora.values())
+        resident = {c.name: c.resident_bytes() for c in corpora if c.is_loaded}
+        return {
+            'budget_bytes': self.memory_budget,
+            'resident_bytes': sum(resident.values()),
+            'resident': len(resident),
+            'unloaded': len(corpora) - len(resident),
+            'evictions': self.evictions,
+            'corpora': resident
+        }
+
+    def exists(self, name):
+        return is_valid_corpus_name(name) and os.path.isfile(os.path.join(self._directory(name), "manifest.json"))
+
+    def list(self):
+        """Names of the corpora saved on disk"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            entry for entry in os.listdir(self.root)
+            if is_valid_corpus_name(entry) and os.path.isfile(os.path.join(self.root, entry, "manifest.json"))
+        )
+
+    def delete(self, name):
+        with self._lock:
+            self._corpora.pop(self._key(name), None)
+            shutil.rmtree(self._directory(name), ignore_errors=True)
+        # A recreated corpus restarts its version count, so cached answers must go
+        get_answer_cache().invalidate(name)
+
+_store = CorpusStore()
+
+def get_corpus_store():
+    """Return the process-wide corpus store"""
+    return _store
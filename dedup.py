@@ -0,0 +1,82 @@
+import re
+import zlib
+import hashlib
+import numpy as np
+from config import DEDUP_THRESHOLD, DEDUP_NUM_PERM, DEDUP_BANDS, DEDUP_SHINGLE
+
+_WHITESPACE = re.compile(r'\s+')
+_PRIME = np.uint64(4294967311)  # smallest prime above 2**32, so permuted crc32 values do not collide
+
+def _normalize(text):
+    return _WHITESPACE.sub(' ', text.lower()).strip()
+
+class ChunkDeduplicator:
+    """Spot chunks that repeat an earlier one, exactly or nearly
+
+    Exact duplicates (ignoring case and whitespace) are found by content
+    hash. Near duplicates, such as the same page OCR'd twice or a lightly
+    edited version of a report, are found with MinHash signatures over word
+    shingles and banded locality-sensitive hashing; a candidate counts when
+    the estimated Jaccard similarity reaches the threshold.
+    """
+    def __init__(self, threshold=DEDUP_THRESHOLD, num_perm=DEDUP_NUM_PERM, bands=DEDUP_BANDS, shingle=DEDUP_SHINGLE, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        rng = np.random.default_rng(seed)
+        # Coefficients below 2**31 keep a * crc32 + b within uint64
+        self._a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle = shingle
+        self._exact = {}                              # content hash -> ref
+        self._buckets = [{} for _ in range(bands)]    # per band: band bytes -> [ref]
+        self._signatures = {}                         # ref -> signature
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+
+    def signature(self, text):
+        """MinHash signature of the text's word shingles, or None if it is too short"""
+        words = _normalize(text).split(' ')
+        if len(words) < self.shingle:
+            return None
+        hashes = np.unique(np.fromiter(
+            (zlib.crc32(' '.join(words[i:i + self.shingle]).encode('utf-8')) for i in range(len(words) - self.shingle + 1)),
+            dtype=np.uint64
+        ))
+        return ((np.outer(self._a, hashes) + self._b[:, None]) % _PRIME).min(axis=1)
+
+    def check(self, text, ref):
+        """Return the ref of an earlier chunk that text duplicates, or register it under ref"""
+        digest = hashlib.sha1(_normalize(text).encode('utf-8')).digest()
+        original = self._exact.get(digest)
+        if original is not None:
+            self.exact_duplicates += 1
+            return original
+
+        signature = self.signature(text)
+        if signature is not None:
+            keys = [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+            seen = set()
+            for band, key in zip(self._buckets, keys):
+                for candidate in band.get(key, ()):
+                    if candidate in seen:
+                        continue
+                    seen.add(candidate)
+                    if np.mean(self._signatures[candidate] == signature) >= self.threshold:
+                        self.near_duplicates += 1
+                        return candidate
+            for band, key in zip(self._buckets, keys):
+                band.setdefault(key, []).append(ref)
+            self._signatures[ref] = signature
+
+        self._exact[digest] = ref
+        return None
+
+    def stats(self):
+        return {
+            'duplicate_chunks': self.exact_duplicates + self.near_duplicates,
+            'exact_duplicates': self.exact_duplicates,
+            'near_duplicates': self.near_duplicates
+        }
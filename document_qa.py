@@ -1,103 +1,222 @@
-import numpy as np
-import faiss
 import re
-from io import BytesIO
-from docx import Document
-from PyPDF2 import PdfReader
-from PIL import Image
-from langchain.chains import RetrievalQA
-from langchain.text_splitter import CharacterTextSplitter
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain_community.docstore.in_memory import InMemoryDocstore
-from langchain_openai import ChatOpenAI
-from langchain_community.document_loaders import WebBaseLoader
-from image_processor import ImageProcessor
+import time
+import asyncio
+import hashlib
+from llm import qa_prompt
+from llm_scheduler import get_scheduler
+from extraction import extract_pages, text_key
+from chunking import chunk_pages
+from corpus_store import get_corpus_store
+from config import DEFAULT_CORPUS, RETRIEVAL_TOP_K
+from streaming import AnswerStream
+from answer_cache import get_answer_cache
+import tracing
+from tracing import span
 from utils import calculate_metrics
+from lexical_index import hybrid_search
 
-def process_input(input_type, input_data):
-    """Process different types of input and create a vector store for querying"""
-    documents = ""
-    
-    if input_type == "Link":
-        loader = WebBaseLoader(input_data)
-        web_documents = loader.load()
-        text_splitter = CharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-        texts = [str(doc.page_content) for doc in text_splitter.split_documents(web_documents)]
-    elif input_type == "PDF":
-        for file in input_data:
-            pdf_reader = PdfReader(BytesIO(file.read()))
-            for page in pdf_reader.pages:
-                documents += page.extract_text() + "\n"
-    elif input_type == "Text":
-        documents = input_data
-    elif input_type == "DOCX":
-        for file in input_data:
-            doc = Document(BytesIO(file.read()))
-            documents += "\n".join([para.text for para in doc.paragraphs]) + "\n"
-    elif input_type == "TXT":
-        for file in input_data:
-            documents += file.read().decode('utf-8') + "\n"
-    elif input_type == "Image":
-        image_processor = ImageProcessor()
+FILE_INPUT_TYPES = ("PDF", "DOCX", "TXT", "Image")
+
+def upload_digest(file):
+    """SHA-256 of an uploaded file's content"""
+    file.seek(0)
+    digest = hashlib.sha256()
+    for block in iter(lambda: file.read(1 << 20), b""):
+        digest.update(block)
+    file.seek(0)
+    return digest.hexdigest()
+
+def _changed_uploads(corpus, input_type, input_data):
+    """Drop uploads the corpus already holds with identical content
+
+    Returns the inputs still to process, their content hashes by document
+    key, and how many were skipped. Links are fetched here (unchanged pages
+    come back as cheap 304s from the link cache) and compared by the hash of
+    their parsed text; pasted text is keyed by its hash already.
+    """
+    if input_type in FILE_INPUT_TYPES:
+        changed, hashes = [], {}
         for file in input_data:
-            image = Image.open(BytesIO(file.read()))
-            text = image_processor.process_image(image)
-            documents += text + "\n"
-    else:
-        raise ValueError("Unsupported input type")
-
-    if input_type != "Link":
-        text_splitter = CharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-        texts = text_splitter.split_text(documents)
-
-    # Create embeddings using HuggingFace model
-    embeddings = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-mpnet-base-v2",
-        model_kwargs={'device': 'cpu'},
-        encode_kwargs={'normalize_embeddings': False}
-    )
-    
-    # Set up FAISS vector store
-    dimension = np.array(embeddings.embed_query("sample text")).shape[0]
-    index = faiss.IndexFlatL2(dimension)
-    
-    vector_store = FAISS(
-        embedding_function=embeddings.embed_query,
-        index=index,
-        docstore=InMemoryDocstore(),
-        index_to_docstore_id={},
-    )
-    vector_store.add_texts(texts)
-    return vector_store
-
-def answer_question(vectorstore, query, openrouter_api_key):
-    """Answer a question using the vector store and OpenRouter API"""
-    try:
-        # Get relevant context from vector store
-        context = " ".join([doc.page_content for doc in vectorstore.as_retriever().get_relevant_documents(query)])
-        
-        # Use OpenRouter with Mistral-7B-Instruct (free)
-        llm = ChatOpenAI(
-            model="mistralai/mistral-7b-instruct:free",
-            openai_api_key=openrouter_api_key,
-            base_url="https://openrouter.ai/api/v1",
-            temperature=0.6,
-            max_tokens=1000
-        )
-        
-        # Use LangChain for retrieval QA
-        qa = RetrievalQA.from_chain_type(llm=llm, retriever=vectorstore.as_retriever())
-        result = qa({"query": query})
-        answer = result.get("result", "No answer found.")
-        
-        # Calculate metrics
+            digest = upload_digest(file)
+            if corpus.content_hash(file.name) != digest:
+                changed.append(file)
+                hashes[file.name] = digest
+        return changed, hashes, len(input_data) - len(changed)
+    if input_type == "Link":
+        from link_ingest import fetch_links
+        changed, hashes = [], {}
+        with span("fetch"):
+            results = fetch_links(input_data)
+        for result in results:
+            digest = hashlib.sha256(result.text.encode("utf-8")).hexdigest()
+            if corpus.content_hash(result.url) != digest:
+                changed.append(result)
+                hashes[result.url] = digest
+        return changed, hashes, len(input_data) - len(changed)
+    if input_type == "Text":
+        if text_key(input_data) in corpus.manifest["documents"]:
+            return None, {}, 1
+    return input_data, {}, 0
+
+def process_input(input_type, input_data, corpus_name=DEFAULT_CORPUS):
+    """Process different types of input and add them to a named, persisted corpus
+
+    Documents already in the corpus under the same key are replaced; everything
+    else is kept, so only the new upload is embedded. Uploads and links whose
+    content is unchanged since they were added are skipped.
+
+    Returns (ingest_stats, trace). The corpus' searchable view is not built
+    here; it is assembled on first use by corpus.vectorstore.
+    """
+    with tracing.trace("ingest", input_type=input_type, corpus=corpus_name) as trace:
+        corpus = get_corpus_store().open(corpus_name)
+        input_data, hashes, skipped = _changed_uploads(corpus, input_type, input_data)
+        if input_data:
+            # Pages stream from extraction through the chunker straight into the embedder
+            pages = tracing.traced_iter("extract", extract_pages(input_type, input_data))
+            chunks = tracing.traced_iter("chunk", chunk_pages(pages))
+            stats = corpus.add_chunks(chunks, hashes=hashes)
+        else:
+            stats = {}
+    return {'chunks': 0, **stats, 'skipped_uploads': skipped}, trace
+
+def _embed_query(vectorstore, query):
+    return vectorstore.embedding_function(query)
+
+def _retrieve(vectorstore, query, query_vector, k=RETRIEVAL_TOP_K):
+    """Fuse BM25 and dense rankings for an already embedded query"""
+    return hybrid_search(vectorstore, query, query_vector, k=k)
+
+def _lookup(vectorstore, query, corpus_key, query_vector=None, trace=None):
+    """Embed the query (unless already embedded) and check the answer cache"""
+    if query_vector is None:
+        with span("embed_query", trace):
+            query_vector = _embed_query(vectorstore, query)
+    entry = kind = None
+    if corpus_key is not None:
+        with span("answer_cache", trace):
+            entry, kind = get_answer_cache().get(corpus_key, query, query_vector)
+    return query_vector, entry, kind
+
+def _search(vectorstore, query, query_vector, trace=None):
+    """Retrieve once and pack the documents into the prompt's token budget
+
+    Returns (messages, context, report); the packed context feeds both the
+    prompt and the metrics.
+    """
+    with span("search", trace):
+        docs = _retrieve(vectorstore, query, query_vector)
+    with span("pack", trace):
+        messages, context, report = qa_prompt(docs, query)
+    trace = trace or tracing.current_trace()
+    if trace is not None:
+        trace.attrs["prompt_tokens"] = report["prompt_tokens"]
+        trace.attrs["context_truncated"] = report["truncated"]
+        trace.attrs["context_dropped"] = report["dropped"]
+    return messages, context, report
+
+def _finish(query, query_vector, answer, context, report, corpus_key, started):
+    with span("metrics"):
         metrics = calculate_metrics(answer, context)
-        return answer, context, metrics
-        
+    metrics['prompt'] = report
+    if corpus_key is not None:
+        get_answer_cache().put(corpus_key, query, query_vector, answer, context, metrics, time.perf_counter() - started)
+    return answer, context, metrics
+
+def _error_result(error):
+    error_metrics = {
+        'f1': 0.0, 'exact_match': 0.0, 'bleu': 0.0,
+        'rouge': {'rouge1': 0.0, 'rouge2': 0.0, 'rougeL': 0.0}
+    }
+    return f"An error occurred: {str(error)}", "", error_metrics
+
+def answer_question(vectorstore, query, openrouter_api_key, corpus_key=None, query_vector=None):
+    """Answer a question using the vector store and OpenRouter API
+
+    When corpus_key (corpus name, version) is given, answers are served from
+    and stored in the process-wide answer cache. A precomputed query_vector
+    skips embedding the question.
+    """
+    try:
+        with tracing.trace("query"):
+            started = time.perf_counter()
+            query_vector, entry, _ = _lookup(vectorstore, query, corpus_key, query_vector)
+            if entry is not None:
+                return entry["answer"], entry["context"], entry["metrics"]
+            messages, context, report = _search(vectorstore, query, query_vector)
+
+            # Use OpenRouter with Mistral-7B-Instruct (free) through the shared scheduler,
+            # stuffing the packed documents into the prompt without a second search
+            scheduler = get_scheduler(openrouter_api_key)
+            with span("llm"):
+                answer = scheduler.complete_sync(messages, temperature=0.6, max_tokens=1000) or "No answer found."
+            return _finish(query, query_vector, answer, context, report, corpus_key, started)
+    except Exception as e:
+        return _error_result(e)
+
+async def answer_question_async(vectorstore, query, openrouter_api_key, corpus_key=None, query_vector=None):
+    """answer_question for event-loop callers
+
+    Embedding, search and metrics run in worker threads; the OpenRouter call
+    is awaited, so many questions can wait on the LLM without holding threads.
+    """
+    try:
+        with tracing.trace("query", asynchronous=True):
+            started = time.perf_counter()
+            query_vector, entry, _ = await asyncio.to_thread(_lookup, vectorstore, query, corpus_key, query_vector)
+            if entry is not None:
+                return entry["answer"], entry["context"], entry["metrics"]
+            messages, context, report = await asyncio.to_thread(_search, vectorstore, query, query_vector)
+
+            scheduler = get_scheduler(openrouter_api_key)
+            with span("llm"):
+                answer = await scheduler.complete(messages, temperature=0.6, max_tokens=1000) or "No answer found."
+            return await asyncio.to_thread(_finish, query, query_vector, answer, context, report, corpus_key, started)
     except Exception as e:
-        error_metrics = {
-            'f1': 0.0, 'exact_match': 0.0, 'bleu': 0.0,
-            'rouge': {'rouge1': 0.0, 'rouge2': 0.0, 'rougeL': 0.0}
-        }
-        return f"An error occurred: {str(e)}", "", error_metrics
\ No newline at end of file
+        return _error_result(e)
+
+def stream_answer(vectorstore, query, openrouter_api_key, corpus_key=None, query_vector=None):
+    """Answer a question token by token
+
+    Returns an AnswerStream; iterate it to receive tokens as OpenRouter
+    produces them. Metrics are computed once the stream is exhausted. A
+    cached answer is replayed as a single token with cache_hit set. With
+    tracing enabled, stream.trace holds the per-stage timings once it ends.
+    """
+    started = time.perf_counter()
+    # The trace outlives this call, so stages are recorded against it explicitly
+    trace = tracing.start_trace("query", streaming=True)
+    query_vector, entry, kind = _lookup(vectorstore, query, corpus_key, query_vector, trace)
+    if entry is not None:
+        stream = AnswerStream(iter([entry["answer"]]), started=started)
+        stream.context = entry["context"]
+        stream.metrics = entry["metrics"]
+        stream.cache_hit = kind
+        stream.trace = trace
+        if trace is not None:
+            trace.attrs["cache_hit"] = kind
+            trace.finish()
+        return stream
+    messages, context, report = _search(vectorstore, query, query_vector, trace)
+
+    # Stream the completion through the shared scheduler
+    scheduler = get_scheduler(openrouter_api_key)
+    llm_started = time.perf_counter()
+    tokens = scheduler.stream_sync(messages, temperature=0.6, max_tokens=1000)
+
+    def on_complete(stream):
+        if trace is not None:
+            trace.add("llm", time.perf_counter() - llm_started)
+            trace.attrs["time_to_first_token"] = stream.time_to_first_token
+        with span("metrics", trace):
+            stream.metrics = calculate_metrics(stream.answer, context)
+        stream.metrics['prompt'] = report
+        if corpus_key is not None:
+            get_answer_cache().put(corpus_key, query, query_vector, stream.answer, context, stream.metrics, stream.latency)
+        if trace is not None:
+            trace.finish()
+
+    stream = AnswerStream(tokens, on_complete=on_complete, started=started)
+    stream.context = context
+    stream.trace = trace
+    return stream
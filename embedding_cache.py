@@ -0,0 +1,128 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from config import EMBEDDING_CACHE_DIR, EMBEDDING_CACHE_MAX_ENTRIES
+
+class EmbeddingCache:
+    """Content-addressed on-disk cache of embedding vectors for one model
+
+    Vectors live in a fixed-size memory-mapped float32 file; an index file maps
+    the hash of (model name, chunk text) to a row. When the cache is full the
+    least recently used row is reused.
+    """
+    def __init__(self, model_name, dimension, cache_dir=EMBEDDING_CACHE_DIR, max_entries=EMBEDDING_CACHE_MAX_ENTRIES):
+        self.model_name = model_name
+        self.dimension = dimension
+        self.max_entries = max_entries
+        self.directory = os.path.join(cache_dir, re.sub(r'[^0-9A-Za-z_.-]+', '_', model_name))
+        self.vectors_path = os.path.join(self.directory, "vectors.f32")
+        self.index_path = os.path.join(self.directory, "index.json")
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> row, oldest first
+        self._free_rows = []
+        self._dirty = False
+        os.makedirs(self.directory, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        index = None
+        if os.path.isfile(self.index_path) and os.path.isfile(self.vectors_path):
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    index = json.load(f)
+            except (OSError, ValueError):
+                index = None
+        # A cache written for another dimension or size cannot be reused
+        if index is None or index.get("dimension") != self.dimension or index.get("max_entries") != self.max_entries:
+            index = {"entries": []}
+            if os.path.exists(self.vectors_path):
+                os.remove(self.vectors_path)
+        mode = "r+" if os.path.exists(self.vectors_path) else "w+"
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode=mode, shape=(self.max_entries, self.dimension))
+        self._entries = OrderedDict((key, row) for key, row in index["entries"])
+        used = set(self._entries.values())
+        self._free_rows = [row for row in range(self.max_entries - 1, -1, -1) if row not in used]
+
+    def key(self, text):
+        """Return the content address of a chunk for this model"""
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, texts):
+        """Look up texts; return a list holding a vector or None for each text"""
+        results = []
+        with self._lock:
+            for text in texts:
+                key = self.key(text)
+                row = self._entries.get(key)
+                if row is None:
+                    self.misses += 1
+                    results.append(None)
+                else:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    results.append(np.array(self._vectors[row]))
+                    self._dirty = True
+        return results
+
+    def put_many(self, texts, matrix):
+        """Store one vector per text, evicting least recently used rows when full"""
+        with self._lock:
+            for text, vector in zip(texts, matrix):
+                key = self.key(text)
+                row = self._entries.get(key)
+                if row is None:
+                    if self._free_rows:
+                        row = self._free_rows.pop()
+                    else:
+                        _, row = self._entries.popitem(last=False)
+                    self._entries[key] = row
+                else:
+                    self._entries.move_to_end(key)
+                self._vectors[row] = vector
+            self._dirty = True
+
+    def flush(self):
+        """Write vectors and the index file to disk"""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._vectors.flush()
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "model_name": self.model_name,
+                    "dimension": self.dimension,
+                    "max_entries": self.max_entries,
+                    "entries": list(self._entries.items())
+                }, f)
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
+
+    def stats(self):
+        """Return hit/miss counters and occupancy"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._entries),
+            'max_entries': self.max_entries
+        }
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_cache(model_name, dimension):
+    """Return the process-wide cache for a model, opening it on first use"""
+    with _caches_lock:
+        cache = _caches.get(model_name)
+        if cache is None:
+            cache = EmbeddingCache(model_name, dimension)
+            _caches[model_name] = cache
+        return cache
@@ -0,0 +1,158 @@
+import threading
+import time
+import numpy as np
+from embedding_cache import get_cache
+from tracing import span
+from config import EMBEDDING_MODEL, EMBEDDING_DEVICE, EMBEDDING_BATCH_SIZE, EMBEDDING_THREADS
+
+class EmbeddingRegistry:
+    """Process-wide registry that loads each embedding model once and shares it"""
+    def __init__(self):
+        self._models = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._warm_threads = {}
+
+    def _model_lock(self, model_name):
+        with self._lock:
+            return self._locks.setdefault(model_name, threading.Lock())
+
+    def get(self, model_name=EMBEDDING_MODEL):
+        """Return the shared embeddings object, loading the model on first use"""
+        embeddings = self._models.get(model_name)
+        if embeddings is not None:
+            return embeddings
+        # Only one thread loads a given model; the others wait for it
+        with self._model_lock(model_name):
+            embeddings = self._models.get(model_name)
+            if embeddings is None:
+                from langchain_community.embeddings import HuggingFaceEmbeddings
+                if EMBEDDING_THREADS > 0:
+                    import torch
+                    torch.set_num_threads(EMBEDDING_THREADS)
+                embeddings = HuggingFaceEmbeddings(
+                    model_name=model_name,
+                    model_kwargs={'device': EMBEDDING_DEVICE},
+                    # Unit vectors let the index use inner product as cosine similarity
+                    encode_kwargs={'normalize_embeddings': True}
+                )
+                self._models[model_name] = embeddings
+            return embeddings
+
+    def register(self, model_name, embeddings):
+        """Install a ready-made embeddings object (e.g. an offline stand-in) under a name
+
+        The object must expose the same surface as HuggingFaceEmbeddings:
+        embed_query, encode_kwargs and a sentence-transformers style client.
+        """
+        with self._model_lock(model_name):
+            self._models[model_name] = embeddings
+
+    def dimension(self, model_name=EMBEDDING_MODEL):
+        """Return the embedding dimension from the model config, without running inference"""
+        return self.get(model_name).client.get_sentence_embedding_dimension()
+
+    def is_loaded(self, model_name=EMBEDDING_MODEL):
+        """Check whether a model is already resident in this process"""
+        return model_name in self._models
+
+    def warm_up(self, model_name=EMBEDDING_MODEL):
+        """Load the model and run a first forward pass in a background thread"""
+        with self._lock:
+            thread = self._warm_threads.get(model_name)
+            if thread is not None:
+                return thread
+            thread = threading.Thread(target=self._warm, args=(model_name,), name=f"warm-up:{model_name}", daemon=True)
+            self._warm_threads[model_name] = thread
+        thread.start()
+        return thread
+
+    def _warm(self, model_name):
+        try:
+            self.get(model_name).embed_query("warm up")
+        except Exception:
+            # Warm-up is best effort; a real failure will surface on first use
+            pass
+
+_registry = EmbeddingRegistry()
+
+def get_registry():
+    """Return the process-wide embedding registry"""
+    return _registry
+
+def get_embeddings(model_name=EMBEDDING_MODEL):
+    """Return the shared embeddings object for a model"""
+    return _registry.get(model_name)
+
+def encode_batch(texts, model_name=EMBEDDING_MODEL):
+    """Embed a list of texts in one forward pass and return a float32 matrix"""
+    embeddings = _registry.get(model_name)
+    vectors = embeddings.client.encode(
+        list(texts),
+        batch_size=max(len(texts), 1),
+        convert_to_numpy=True,
+        show_progress_bar=False,
+        **embeddings.encode_kwargs
+    )
+    return np.ascontiguousarray(vectors, dtype=np.float32)
+
+def embed_in_batches(texts, batch_size=EMBEDDING_BATCH_SIZE, model_name=EMBEDDING_MODEL, stats=None):
+    """Yield (texts, matrix) pairs for consecutive batches of an iterable of texts
+
+    If a stats dict is given it is filled with chunk count, elapsed seconds,
+    chunks_per_second and embedding cache hits/misses as batches are produced.
+    """
+    if stats is None:
+        stats = {}
+    stats.update({
+        'chunks': 0, 'batches': 0, 'seconds': 0.0, 'chunks_per_second': 0.0,
+        'batch_size': batch_size, 'cache_hits': 0, 'cache_misses': 0
+    })
+    batch = []
+    for text in texts:
+        batch.append(text)
+        if len(batch) >= batch_size:
+            yield batch, _timed_encode(batch, model_name, stats)
+            batch = []
+    if batch:
+        yield batch, _timed_encode(batch, model_name, stats)
+    _get_cache(model_name).flush()
+
+def _get_cache(model_name):
+    # Normalisation changes the stored vectors, so it is part of the cache namespace
+    normalize = _registry.get(model_name).encode_kwargs.get('normalize_embeddings', False)
+    return get_cache(f"{model_name}|normalized={normalize}", _registry.dimension(model_name))
+
+def encode_batch_cached(texts, model_name=EMBEDDING_MODEL, stats=None):
+    """Embed a list of texts, reusing cached vectors and only encoding unseen chunks"""
+    cache = _get_cache(model_name)
+    cached = cache.get_many(texts)
+    missing = [i for i, vector in enumerate(cached) if vector is None]
+    matrix = np.empty((len(texts), cache.dimension), dtype=np.float32)
+    for i, vector in enumerate(cached):
+        if vector is not None:
+            matrix[i] = vector
+    if missing:
+        missing_texts = [texts[i] for i in missing]
+        encoded = encode_batch(missing_texts, model_name)
+        matrix[missing] = encoded
+        cache.put_many(missing_texts, encoded)
+    if stats is not None:
+        stats['cache_hits'] = stats.get('cache_hits', 0) + len(texts) - len(missing)
+        stats['cache_misses'] = stats.get('cache_misses', 0) + len(missing)
+    return matrix
+
+def cache_stats(model_name=EMBEDDING_MODEL):
+    """Hit/miss counters of the embedding cache used for a model"""
+    return _get_cache(model_name).stats()
+
+def _timed_encode(batch, model_name, stats):
+    start = time.perf_counter()
+    with span("embed"):
+        matrix = encode_batch_cached(batch, model_name, stats)
+    stats['seconds'] += time.perf_counter() - start
+    stats['chunks'] += len(batch)
+    stats['batches'] += 1
+    if stats['seconds'] > 0:
+        stats['chunks_per_second'] = stats['chunks'] / stats['seconds']
+    return matrix
@@ -0,0 +1,177 @@
+import io
+import os
+import hashlib
+import shutil
+import tempfile
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from config import EXTRACTION_WORKERS, EXTRACTION_PAGE_CHARS, PDF_PAGES_PER_TASK
+
+# A page-sized piece of extracted text and where it came from
+ExtractedPage = namedtuple("ExtractedPage", ["source", "page", "text"])
+
+class NamedUpload(io.BytesIO):
+    """In-memory upload with a file name, like Streamlit's UploadedFile"""
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    """Return the process-wide extraction pool, or None when running inline"""
+    global _executor
+    if EXTRACTION_WORKERS <= 1:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=EXTRACTION_WORKERS)
+        return _executor
+
+# Worker-side cache so consecutive page ranges of one PDF reuse its parsed xref
+_worker_reader = (None, None)
+
+def _pdf_reader(path):
+    global _worker_reader
+    if _worker_reader[0] != path:
+        from PyPDF2 import PdfReader
+        _worker_reader = (path, PdfReader(path))
+    return _worker_reader[1]
+
+def _extract_pdf_pages(path, start, stop):
+    """Extract the text of pages [start, stop) of a PDF on disk"""
+    reader = _pdf_reader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+def _extract_docx(path, page_chars=EXTRACTION_PAGE_CHARS):
+    """Extract a DOCX file as page-sized groups of paragraphs"""
+    from docx import Document
+    pages, current, size = [], [], 0
+    for para in Document(path).paragraphs:
+        current.append(para.text)
+        size += len(para.text) + 1
+        if size >= page_chars:
+            pages.append("\n".join(current))
+            current, size = [], 0
+    if current:
+        pages.append("\n".join(current))
+    return pages
+
+def _spool(file, directory):
+    """Copy an upload to a temporary file so workers can open it by path"""
+    file.seek(0)
+    fd, path = tempfile.mkstemp(dir=directory, suffix=os.path.splitext(getattr(file, "name", ""))[1])
+    with os.fdopen(fd, "wb") as out:
+        shutil.copyfileobj(file, out)
+    return path
+
+def _run_ordered(tasks, executor, window):
+    """Run (fn, args, source, first_page) tasks, yielding pages in order
+
+    At most `window` tasks are in flight, which bounds the memory held by
+    finished-but-not-yet-consumed results.
+    """
+    if executor is None:
+        for fn, args, source, first_page in tasks:
+            for offset, text in enumerate(fn(*args)):
+                yield ExtractedPage(source, first_page + offset, text)
+        return
+    in_flight = deque()
+    tasks = iter(tasks)
+    try:
+        for task in tasks:
+            fn, args, source, first_page = task
+            in_flight.append((executor.submit(fn, *args), source, first_page))
+            if len(in_flight) >= window:
+                future, source, first_page = in_flight.popleft()
+                for offset, text in enumerate(future.result()):
+                    yield ExtractedPage(source, first_page + offset, text)
+        while in_flight:
+            future, source, first_page = in_flight.popleft()
+            for offset, text in enumerate(future.result()):
+                yield ExtractedPage(source, first_page + offset, text)
+    finally:
+        for future, _, _ in in_flight:
+            future.cancel()
+
+def _pdf_tasks(paths):
+    from PyPDF2 import PdfReader
+    for name, path in paths:
+        page_count = len(PdfReader(path).pages)
+        for start in range(0, page_count, PDF_PAGES_PER_TASK):
+            stop = min(start + PDF_PAGES_PER_TASK, page_count)
+            yield _extract_pdf_pages, (path, start, stop), name, start + 1
+
+def _docx_tasks(paths):
+    for name, path in paths:
+        yield _extract_docx, (path,), name, 1
+
+def _cut(text, page_chars):
+    """Index to end a piece at: the last paragraph break, else whitespace, before the limit"""
+    for separator in ("\n\n", "\n", " "):
+        cut = text.rfind(separator, 0, page_chars)
+        if cut > 0:
+            return cut + len(separator)
+    return page_chars
+
+def _iter_txt(file, page_chars=EXTRACTION_PAGE_CHARS):
+    """Decode a text upload incrementally in page-sized pieces
+
+    Pieces end at a paragraph break or whitespace where possible; the rest
+    of the window carries over into the next piece, so words and
+    paragraphs are not split.
+    """
+    file.seek(0)
+    reader = io.TextIOWrapper(file, encoding="utf-8")
+    try:
+        page, carry = 1, ""
+        while True:
+            text = carry + reader.read(page_chars - len(carry))
+            if not text:
+                break
+            cut = _cut(text, page_chars) if len(text) >= page_chars else len(text)
+            yield ExtractedPage(file.name, page, text[:cut])
+            carry = text[cut:]
+            page += 1
+    finally:
+        # Leave the upload itself open for the caller
+        reader.detach()
+
+def text_key(text):
+    """Document key for pasted text, derived from its content"""
+    return f"text:{hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]}"
+
+def extract_pages(input_type, input_data):
+    """Yield ExtractedPage pieces for the given input as soon as they are ready
+
+    PDF pages and DOCX files are extracted in a process pool; the generator
+    yields pages in input order so splitting and embedding can start before
+    extraction finishes.
+    """
+    # Input-specific libraries are imported on first use to keep start-up light
+    if input_type == "Link":
+        from link_ingest import fetch_links, LinkResult
+        # Callers that already fetched the pages pass the LinkResults instead of URLs
+        if not all(isinstance(item, LinkResult) for item in input_data):
+            input_data = fetch_links(input_data)
+        for result in input_data:
+            yield ExtractedPage(result.url, 1, result.text)
+    elif input_type == "Text":
+        yield ExtractedPage(text_key(input_data), 1, input_data)
+    elif input_type == "TXT":
+        for file in input_data:
+            yield from _iter_txt(file)
+    elif input_type == "Image":
+        from image_processor import get_ocr_pipeline
+        for name, text in get_ocr_pipeline().process_files(input_data):
+            yield ExtractedPage(name, 1, text)
+    elif input_type in ("PDF", "DOCX"):
+        executor = get_executor()
+        with tempfile.TemporaryDirectory(prefix="askit-extract-") as directory:
+            paths = [(file.name, _spool(file, directory)) for file in input_data]
+            tasks = _pdf_tasks(paths) if input_type == "PDF" else _docx_tasks(paths)
+            yield from _run_ordered(tasks, executor, window=2 * max(EXTRACTION_WORKERS, 1))
+    else:
+        raise ValueError("Unsupported input type")
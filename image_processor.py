@@ -1,9 +1,27 @@
 import os
 import re
+import hashlib
+import threading
 import subprocess
+from io import BytesIO
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 import pytesseract
-from PIL import Image
+from PIL import Image, ImageOps
 import streamlit as st
+from config import OCR_WORKERS, OCR_MAX_SIDE, OCR_CACHE_DIR
+
+@lru_cache(maxsize=None)
+def _tesseract_available(tesseract_cmd):
+    """Probe a Tesseract binary once per process"""
+    if not os.path.isfile(tesseract_cmd):
+        return False
+    try:
+        subprocess.run([tesseract_cmd, '--version'], capture_output=True, check=True)
+        return True
+    except:
+        return False
 
 class TesseractManager:
     """Manages Tesseract OCR installation and configuration"""
@@ -12,13 +30,7 @@ class TesseractManager:
 
     def is_available(self):
         """Check if Tesseract OCR is installed and available"""
-        if not os.path.isfile(self.tesseract_cmd):
-            return False
-        try:
-            subprocess.run([self.tesseract_cmd, '--version'], capture_output=True, check=True)
-            return True
-        except:
-            return False
+        return _tesseract_available(self.tesseract_cmd)
 
     def configure_tesseract(self):
         """Configure the pytesseract library to use the installed Tesseract OCR"""
@@ -41,15 +53,131 @@ class ImageProcessor:
     def process_image(self, image):
         """Extract text from an image using OCR"""
         try:
-            img = image.convert('L')  # Convert to grayscale for better OCR
-            text = pytesseract.image_to_string(img, config='--oem 3 --psm 6')
-            return self.clean_text(text)
+            return self.ocr(image)
         except Exception as e:
             st.error(f"OCR Error: {str(e)}")
             return ""
+
+    def ocr(self, image):
+        """Extract text from an image, raising on OCR failure (safe to call from worker threads)"""
+        img = self.prepare_image(image)
+        text = pytesseract.image_to_string(img, config='--oem 3 --psm 6')
+        return self.clean_text(text)
+
+    def prepare_image(self, image):
+        """Convert to grayscale; downscale and binarize oversized scans"""
+        img = image.convert('L')  # Convert to grayscale for better OCR
+        if max(img.size) > OCR_MAX_SIDE:
+            img.thumbnail((OCR_MAX_SIDE, OCR_MAX_SIDE), Image.LANCZOS)
+            img = ImageOps.autocontrast(img)
+            threshold = _otsu_threshold(img.histogram())
+            img = img.point(lambda p: 255 if p > threshold else 0, mode='1')
+        return img
     
     def clean_text(self, text):
         """Clean the extracted text"""
         text = re.sub(r'[^\x00-\x7F]+', ' ', text)  # Remove non-ASCII characters
         text = re.sub(r'\s+', ' ', text).strip()     # Normalize whitespace
-        return text
\ No newline at end of file
+        return text
+
+def _otsu_threshold(histogram):
+    """Pick the grey level that best separates ink from paper"""
+    total = sum(histogram)
+    weighted_total = sum(i * count for i, count in enumerate(histogram))
+    background, weighted_background = 0, 0
+    best_threshold, best_variance = 127, -1.0
+    for i, count in enumerate(histogram):
+        background += count
+        if background == 0:
+            continue
+        foreground = total - background
+        if foreground == 0:
+            break
+        weighted_background += i * count
+        mean_background = weighted_background / background
+        mean_foreground = (weighted_total - weighted_background) / foreground
+        variance = background * foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_threshold, best_variance = i, variance
+    return best_threshold
+
+_image_processor = None
+_image_processor_lock = threading.Lock()
+
+def get_image_processor():
+    """Return the process-wide ImageProcessor"""
+    global _image_processor
+    with _image_processor_lock:
+        if _image_processor is None:
+            _image_processor = ImageProcessor()
+        return _image_processor
+
+class OCRPipeline:
+    """OCR many images in parallel with results cached by image content
+
+    Tesseract runs as a subprocess, so a thread pool gives real parallelism.
+    Results are cached on disk under the SHA-256 of the uploaded bytes, so a
+    re-upload of the same scan is answered without running OCR again.
+    """
+    def __init__(self, workers=OCR_WORKERS, cache_dir=OCR_CACHE_DIR):
+        self.workers = max(workers, 1)
+        self.cache_dir = cache_dir
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ocr")
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _cache_path(self, digest):
+        return os.path.join(self.cache_dir, f"{digest}-{OCR_MAX_SIDE}.txt")
+
+    def _ocr_bytes(self, data, digest):
+        # Decoding happens in the worker too, so large scans decode in parallel
+        text = get_image_processor().ocr(Image.open(BytesIO(data)))
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._cache_path(digest)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(path + ".tmp", path)
+        return text
+
+    def _submit(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._cache_path(digest)
+        if os.path.isfile(path):
+            self.cache_hits += 1
+            with open(path, "r", encoding="utf-8") as f:
+                return None, f.read()
+        self.cache_misses += 1
+        return self._executor.submit(self._ocr_bytes, data, digest), None
+
+    def process_files(self, files):
+        """Yield (file name, text) for uploaded image files, in upload order"""
+        get_image_processor()  # configure Tesseract (and warn) once, on the calling thread
+        window = deque()
+        for file in files:
+            window.append((file.name, *self._submit(file.read())))
+            if len(window) >= 2 * self.workers:
+                yield self._result(*window.popleft())
+        while window:
+            yield self._result(*window.popleft())
+
+    def _result(self, name, future, text):
+        if future is not None:
+            try:
+                text = future.result()
+            except Exception as e:
+                st.error(f"OCR Error: {str(e)}")
+                text = ""
+        return name, text
+
+    def stats(self):
+        return {'cache_hits': self.cache_hits, 'cache_misses': self.cache_misses}
+
+_pipeline = None
+
+def get_ocr_pipeline():
+    """Return the process-wide OCR pipeline"""
+    global _pipeline
+    with _image_processor_lock:
+        if _pipeline is None:
+            _pipeline = OCRPipeline()
+        return _pipeline
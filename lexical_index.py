@@ -0,0 +1,111 @@
+import re
+import math
+import heapq
+from collections import Counter, defaultdict
+from operator import itemgetter
+import numpy as np
+from config import BM25_K1, BM25_B, RETRIEVAL_TOP_K, RETRIEVAL_CANDIDATES, RRF_K
+
+_TOKEN = re.compile(r"\w+")
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have he her his i if in into is it its of on or our she so
+that the their them then there these they this to was we were what when where which who why will with
+you your do does did not no can could would should about how than
+""".split())
+
+def tokenize(text):
+    """Lower-case word tokens without stopwords or single characters"""
+    return [t for t in _TOKEN.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+def term_counts(text):
+    return dict(Counter(tokenize(text)))
+
+def segment_terms(data):
+    """Term counts per vector id for a segment, derived from its docstore if not stored"""
+    terms = data.get("terms")
+    if terms is None:
+        # Segments written before the lexical index existed
+        terms = {
+            vector_id: term_counts(data["docstore"][doc_id].page_content)
+            for vector_id, doc_id in data["index_to_docstore_id"].items()
+        }
+    return terms
+
+class BM25Index:
+    """In-memory inverted index scoring chunks with Okapi BM25"""
+    def __init__(self, k1=BM25_K1, b=BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)  # term -> {vector id: term frequency}
+        self.lengths = {}                  # vector id -> number of terms
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def add(self, terms_by_id):
+        """Index {vector id: {term: count}}"""
+        for vector_id, terms in terms_by_id.items():
+            for term, count in terms.items():
+                self.postings[term][vector_id] = count
+            length = sum(terms.values())
+            self.lengths[vector_id] = length
+            self.total_length += length
+
+    def remove(self, terms_by_id):
+        """Drop vector ids; their term counts say which postings to touch"""
+        for vector_id, terms in terms_by_id.items():
+            if vector_id not in self.lengths:
+                continue
+            for term in terms:
+                posting = self.postings.get(term)
+                if posting is not None:
+                    posting.pop(vector_id, None)
+                    if not posting:
+                        del self.postings[term]
+            self.total_length -= self.lengths.pop(vector_id)
+
+    def search(self, query, k):
+        """Return up to k (vector id, score) pairs, best first"""
+        if not self.lengths:
+            return []
+        n = len(self.lengths)
+        average = self.total_length / n or 1.0
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for vector_id, tf in posting.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[vector_id] / average)
+                scores[vector_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(k, scores.items(), key=itemgetter(1))
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """Fuse ranked lists of ids; ids ranked high in several lists come first"""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, vector_id in enumerate(ranking):
+            scores[vector_id] += 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+def hybrid_search(vectorstore, query, query_vector, k=RETRIEVAL_TOP_K, candidates=RETRIEVAL_CANDIDATES):
+    """Fuse dense FAISS and BM25 rankings and return the top k documents
+
+    Falls back to dense search alone when the store has no lexical index.
+    """
+    lexical = getattr(vectorstore, "lexical_index", None)
+    if lexical is None:
+        return vectorstore.similarity_search_by_vector(query_vector, k=k)
+    _, ids = vectorstore.index.search(np.asarray([query_vector], dtype=np.float32), max(candidates, k))
+    dense = [int(i) for i in ids[0] if i >= 0 and int(i) in vectorstore.index_to_docstore_id]
+    sparse = [vector_id for vector_id, _ in lexical.search(query, max(candidates, k))]
+    docs = []
+    for vector_id in reciprocal_rank_fusion([dense, sparse]):
+        doc = vectorstore.docstore.search(vectorstore.index_to_docstore_id.get(vector_id))
+        if not isinstance(doc, str):
+            docs.append(doc)
+            if len(docs) == k:
+                break
+    return docs
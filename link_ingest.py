@@ -0,0 +1,125 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+from collections import namedtuple
+from urllib.parse import urlsplit
+import httpx
+from bs4 import BeautifulSoup
+import async_runtime
+from config import LINK_CACHE_DIR, LINK_CONCURRENCY, LINK_PER_HOST_CONCURRENCY, LINK_HOST_DELAY, LINK_TIMEOUT
+
+LinkResult = namedtuple("LinkResult", ["url", "status", "text", "from_cache"])
+
+class LinkIngester:
+    """Fetch and parse web pages concurrently with a shared pooled client
+
+    Requests are capped globally and per host, consecutive requests to one
+    host are spaced out, and ETag/Last-Modified validators are kept on disk
+    so unchanged pages come back as 304s and reuse their parsed text.
+    """
+    def __init__(self, client=None, cache_dir=LINK_CACHE_DIR, concurrency=LINK_CONCURRENCY,
+                 per_host=LINK_PER_HOST_CONCURRENCY, host_delay=LINK_HOST_DELAY, timeout=LINK_TIMEOUT):
+        self._client = client
+        self.cache_dir = cache_dir
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.host_delay = host_delay
+        self.timeout = timeout
+        self._semaphore = None
+        self._hosts = {}  # host -> (semaphore, [time of last request])
+        self.fetched = 0
+        self.not_modified = 0
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+                headers={"User-Agent": "AskIt link ingester"}
+            )
+        return self._client
+
+    def _cache_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _load_cached(self, url):
+        try:
+            with open(self._cache_path(url), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _store_cached(self, url, entry):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._cache_path(url)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(path + ".tmp", path)
+
+    def _host_slot(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = (asyncio.Semaphore(self.per_host), [0.0])
+        return self._hosts[host]
+
+    @staticmethod
+    def parse_html(html):
+        """Extract visible text from an HTML page"""
+        return BeautifulSoup(html, "html.parser").get_text()
+
+    async def fetch(self, url):
+        """Fetch one URL, revalidating against the local cache when possible"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        cached = self._load_cached(url)
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        host_semaphore, last_request = self._host_slot(url)
+        async with self._semaphore, host_semaphore:
+            # Politeness: keep a minimum gap between requests to the same host
+            wait = last_request[0] + self.host_delay - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            last_request[0] = time.monotonic()
+            response = await self.client.get(url, headers=headers)
+
+        if response.status_code == 304 and cached:
+            self.not_modified += 1
+            return LinkResult(url, 304, cached["text"], True)
+        response.raise_for_status()
+        self.fetched += 1
+        text = await asyncio.to_thread(self.parse_html, response.text)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self._store_cached(url, {"url": url, "etag": etag, "last_modified": last_modified, "text": text})
+        return LinkResult(url, response.status_code, text, False)
+
+    async def fetch_all(self, urls):
+        """Fetch URLs concurrently, returning results in input order"""
+        return await asyncio.gather(*(self.fetch(url) for url in urls))
+
+    def stats(self):
+        return {'fetched': self.fetched, 'not_modified': self.not_modified}
+
+_ingester = None
+
+def get_link_ingester():
+    """Return the process-wide link ingester (bound to the background loop)"""
+    global _ingester
+    if _ingester is None:
+        _ingester = LinkIngester()
+    return _ingester
+
+def fetch_links(urls):
+    """Fetch and parse a list of URLs from synchronous code"""
+    return async_runtime.run(get_link_ingester().fetch_all(urls))
@@ -0,0 +1,20 @@
+from context_packing import pack_context, count_tokens
+from config import CONTEXT_TOKEN_BUDGET
+
+def _stuff_messages(context, question):
+    from langchain.chains.question_answering.stuff_prompt import CHAT_PROMPT
+    from langchain_community.adapters.openai import convert_message_to_dict
+    return [convert_message_to_dict(m) for m in CHAT_PROMPT.format_messages(context=context, question=question)]
+
+def qa_prompt(docs, question, budget=CONTEXT_TOKEN_BUDGET):
+    """Build the chat messages LangChain's "stuff" QA chain would send
+
+    The documents are packed into a token budget first; the request itself
+    goes through the shared LLM scheduler. Returns (messages, context,
+    report); the report records the prompt token count and which chunks
+    were merged, truncated or dropped.
+    """
+    context, report = pack_context(docs, budget)
+    messages = _stuff_messages(context, question)
+    report['prompt_tokens'] = sum(count_tokens(m.get("content") or "") for m in messages)
+    return messages, context, report
@@ -0,0 +1,252 @@
+import json
+import time
+import queue
+import random
+import asyncio
+import hashlib
+import threading
+from collections import deque
+import httpx
+import async_runtime
+from config import (
+    DEFAULT_MODEL, OPENROUTER_BASE_URL, LLM_MAX_CONCURRENCY, LLM_MAX_CONCURRENCY_PER_MODEL, LLM_MAX_RETRIES, LLM_TIMEOUT
+)
+
+# Statuses worth retrying: rate limiting and transient upstream failures
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_DONE = object()
+
+class LLMScheduler:
+    """Shared scheduler for OpenAI-compatible chat completion requests
+
+    All requests go through one long-lived httpx connection pool on the
+    background event loop. Concurrency is capped globally and per model,
+    429s and 5xx responses are retried with jittered exponential backoff,
+    and identical non-streaming requests in flight at the same time share a
+    single upstream call.
+    """
+    def __init__(self, api_key, base_url=OPENROUTER_BASE_URL, max_concurrency=LLM_MAX_CONCURRENCY,
+                 max_per_model=LLM_MAX_CONCURRENCY_PER_MODEL, max_retries=LLM_MAX_RETRIES, timeout=LLM_TIMEOUT):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.max_per_model = max_per_model
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._client = None
+        self._global = None
+        self._per_model = {}
+        self._inflight = {}  # request hash -> future shared by identical requests
+        self.waiting = 0
+        self.active = 0
+        self.requests = 0
+        self.coalesced = 0
+        self.retries = 0
+        self.failures = 0
+        self._latencies = deque(maxlen=1000)
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "HTTP-Referer": "https://askit-app.streamlit.app",
+                    "X-Title": "AskIt"
+                }
+            )
+        return self._client
+
+    def _payload(self, messages, model, params, stream=False):
+        payload = {"model": model, "messages": messages, **params}
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    def _slot(self, model):
+        # Semaphores are created on the background loop the first time they are needed
+        if self._global is None:
+            self._global = asyncio.Semaphore(self.max_concurrency)
+        if model not in self._per_model:
+            self._per_model[model] = asyncio.Semaphore(self.max_per_model)
+        return self._global, self._per_model[model]
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return min(30.0, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+    async def _send(self, payload, handle):
+        """Send a request with retries; `handle` consumes a successful response
+
+        Only failures before a response body is consumed are retried, so a
+        stream that breaks half-way never replays tokens.
+        """
+        global_slot, model_slot = self._slot(payload["model"])
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            self.waiting += 1
+            acquired = False
+            try:
+                async with global_slot, model_slot:
+                    self.waiting -= 1
+                    acquired = True
+                    self.active += 1
+                    try:
+                        started = time.perf_counter()
+                        request = self.client.build_request("POST", "/chat/completions", json=payload)
+                        try:
+                            response = await self.client.send(request, stream=True)
+                        except httpx.TransportError as e:
+                            error = e
+                        else:
+                            try:
+                                if response.status_code == 200:
+                                    self.requests += 1
+                                    result = await handle(response)
+                                    self._latencies.append(time.perf_counter() - started)
+                                    return result
+                                await response.aread()
+                                error = ValueError(f"OpenRouter API Error: {response.text}")
+                                if response.status_code not in RETRY_STATUSES:
+                                    self.failures += 1
+                                    raise error
+                                retry_after = response.headers.get("Retry-After")
+                            finally:
+                                await response.aclose()
+                    finally:
+                        self.active -= 1
+            finally:
+                if not acquired:
+                    self.waiting -= 1
+            if attempt == self.max_retries:
+                self.failures += 1
+                raise error
+            self.retries += 1
+            await asyncio.sleep(self._backoff(attempt, retry_after))
+
+    async def _complete(self, payload):
+        key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+        shared = self._inflight.get(key)
+        if shared is not None:
+            self.coalesced += 1
+            return await asyncio.shield(shared)
+        shared = asyncio.get_running_loop().create_future()
+        self._inflight[key] = shared
+
+        async def handle(response):
+            result = json.loads(await response.aread())
+            return result["choices"][0]["message"]["content"]
+
+        try:
+            result = await self._send(payload, handle)
+            shared.set_result(result)
+            return result
+        except Exception as e:
+            shared.set_exception(e)
+            shared.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _stream(self, payload, emit):
+        async def handle(response):
+            async for line in response.aiter_lines():
+                # Skip keep-alive comments and blank separators
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                delta = json.loads(data)["choices"][0].get("delta", {})
+                if delta.get("content"):
+                    emit(delta["content"])
+
+        await self._send(payload, handle)
+
+    async def complete(self, messages, model=DEFAULT_MODEL, **params):
+        """Return the completion text; awaitable from any event loop"""
+        return await async_runtime.run_async(self._complete(self._payload(messages, model, params)))
+
+    def complete_sync(self, messages, model=DEFAULT_MODEL, **params):
+        """Return the completion text from synchronous code"""
+        return async_runtime.run(self._complete(self._payload(messages, model, params)))
+
+    async def astream(self, messages, model=DEFAULT_MODEL, **params):
+        """Yield completion tokens in the caller's event loop"""
+        caller = asyncio.get_running_loop()
+        tokens = asyncio.Queue()
+        put = lambda item: caller.call_soon_threadsafe(tokens.put_nowait, item)
+        future = asyncio.run_coroutine_threadsafe(
+            self._produce(self._payload(messages, model, params, stream=True), put), async_runtime.get_loop()
+        )
+        try:
+            while True:
+                item = await tokens.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+    def stream_sync(self, messages, model=DEFAULT_MODEL, **params):
+        """Yield completion tokens from synchronous code"""
+        tokens = queue.Queue()
+        future = asyncio.run_coroutine_threadsafe(
+            self._produce(self._payload(messages, model, params, stream=True), tokens.put), async_runtime.get_loop()
+        )
+        try:
+            while True:
+                item = tokens.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+    async def _produce(self, payload, put):
+        try:
+            await self._stream(payload, put)
+        except Exception as e:
+            put(e)
+        else:
+            put(_DONE)
+
+    def stats(self):
+        """Return queue depth, request counters and latency percentiles in seconds"""
+        latencies = sorted(self._latencies)
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else 0.0
+        return {
+            'queue_depth': self.waiting,
+            'active': self.active,
+            'requests': self.requests,
+            'coalesced': self.coalesced,
+            'retries': self.retries,
+            'failures': self.failures,
+            'latency_p50': percentile(0.50),
+            'latency_p95': percentile(0.95)
+        }
+
+_schedulers = {}
+_lock = threading.Lock()
+
+def get_scheduler(api_key, base_url=OPENROUTER_BASE_URL):
+    """Return the process-wide scheduler for an API key and endpoint"""
+    with _lock:
+        scheduler = _schedulers.get((api_key, base_url))
+        if scheduler is None:
+            scheduler = LLMScheduler(api_key, base_url)
+            _schedulers[(api_key, base_url)] = scheduler
+        return scheduler
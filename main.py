@@ -1,9 +1,92 @@
+import startup
 import streamlit as st
+import uuid
 import asyncio
 from config import OPENROUTER_API_KEY, YOUTUBE_API_KEY, CURRENT_USER
-from document_qa import process_input, answer_question
+from document_qa import process_input, stream_answer
 from youtube_qa import YouTubeQASystem
 from styles import set_custom_style
+from embeddings import get_registry, cache_stats
+from llm_scheduler import get_scheduler
+import tracing
+from corpus_store import get_corpus_store, is_valid_corpus_name
+from answer_cache import get_answer_cache
+from config import TRACING_ENABLED
+
+startup.mark_imported()
+
+# Process-wide resources, shared by every rerun and session instead of rebuilt per rerun
+@st.cache_resource
+def get_youtube_qa():
+    return YouTubeQASystem(YOUTUBE_API_KEY, OPENROUTER_API_KEY)
+
+@st.cache_resource
+def get_llm_scheduler():
+    return get_scheduler(OPENROUTER_API_KEY)
+
+@st.cache_resource
+def get_embedding_registry():
+    # Heavy libraries and the embedding model load in the background from here
+    startup.warm_up()
+    return get_registry()
+
+def render_stream(placeholder, stream):
+    """Render tokens into the answer box as they arrive"""
+    for _ in stream:
+        placeholder.markdown(f"<div class='answer-box'>{stream.answer}▌</div>", unsafe_allow_html=True)
+    placeholder.markdown(f"<div class='answer-box'>{stream.answer}</div>", unsafe_allow_html=True)
+
+async def render_stream_async(placeholder, stream):
+    """Render tokens from an async answer stream as they arrive"""
+    async for _ in stream:
+        placeholder.markdown(f"<div class='answer-box'>{stream.answer}▌</div>", unsafe_allow_html=True)
+    placeholder.markdown(f"<div class='answer-box'>{stream.answer}</div>", unsafe_allow_html=True)
+
+def render_latency(stream):
+    if stream.cache_hit:
+        cache_stats = get_answer_cache().stats()
+        st.caption(
+            f"Answered from cache ({stream.cache_hit} match) in {stream.latency:.2f}s · "
+            f"hit rate {cache_stats['hit_rate']:.0%}, {cache_stats['seconds_saved']:.1f}s saved so far"
+        )
+    else:
+        st.caption(f"First token after {stream.time_to_first_token:.2f}s · total {stream.latency:.2f}s")
+    prompt = (stream.metrics or {}).get('prompt')
+    if prompt:
+        st.caption(
+            f"Prompt {prompt['prompt_tokens']} tokens · context {prompt['context_tokens']} of {prompt['budget']} "
+            f"({prompt['tokenizer']}) · {prompt['chunks']} chunks in {prompt['blocks']} blocks, "
+            f"{prompt['truncated']} truncated, {prompt['dropped']} dropped"
+        )
+
+def render_performance(trace):
+    """Show per-stage timings of a trace next to the shared cache and scheduler stats"""
+    if trace is None or trace.duration is None:
+        return
+    with st.expander("Performance"):
+        rows = [
+            {"Stage": stage, "Seconds": round(entry["seconds"], 4), "Calls": entry["count"],
+             "Share": f"{entry['seconds'] / trace.duration:.0%}" if trace.duration else "-"}
+            for stage, entry in trace.stages.items()
+        ]
+        rows.append({"Stage": "total", "Seconds": round(trace.duration, 4), "Calls": 1, "Share": "100%"})
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+        scheduler = get_llm_scheduler().stats()
+        answers = get_answer_cache().stats()
+        embeddings = cache_stats()
+        st.caption(
+            f"LLM queue {scheduler['queue_depth']} · active {scheduler['active']} · "
+            f"p50 {scheduler['latency_p50']:.2f}s · p95 {scheduler['latency_p95']:.2f}s · retries {scheduler['retries']}"
+        )
+        st.caption(
+            f"Answer cache hit rate {answers['hit_rate']:.0%} ({answers['entries']} entries) · "
+            f"embedding cache hit rate {embeddings['hit_rate']:.0%} ({embeddings['entries']} entries)"
+        )
+        corpora = get_corpus_store().stats()
+        st.caption(
+            f"Corpora in memory {corpora['resident']} ({corpora['resident_bytes'] / 2**20:.0f} of "
+            f"{corpora['budget_bytes'] / 2**20:.0f} MB) · unloaded {corpora['unloaded']} · evictions {corpora['evictions']}"
+        )
 
 def main():
     st.set_page_config(
@@ -14,6 +97,19 @@ def main():
     
     set_custom_style()
     
+    # Import heavy libraries and load the shared embedding model while the page renders
+    get_embedding_registry()
+    
+    with st.sidebar:
+        # The toggle is per session; it applies to this script run only
+        tracing.enable(st.checkbox("Performance tracing", value=TRACING_ENABLED, key="tracing"))
+        timings = startup.report()
+        if tracing.is_enabled() and timings['first_render'] is not None:
+            st.caption(
+                f"Imports {timings['imports']:.2f}s · first render {timings['first_render']:.2f}s"
+                + (f" · warm-up {timings['warm_up']:.1f}s" if timings['warm_up'] is not None else "")
+            )
+    
     # Header section with user info
     with st.container():
         col1, col2 = st.columns([4, 1])
@@ -69,15 +165,37 @@ def main():
 
         # Process button and handling
         process_col1, process_col2 = st.columns([3, 1])
+        # Each session gets its own corpus; only a name typed in here is shared
+        if "session_corpus" not in st.session_state:
+            st.session_state.session_corpus = f"session-{uuid.uuid4().hex[:16]}"
+        with process_col1:
+            corpus_name = st.text_input(
+                "Corpus",
+                value=st.session_state.session_corpus,
+                help="Documents go to a corpus private to this session. Enter a name to save them "
+                     "under it instead; anyone using the same name sees the same documents"
+            ).strip() or st.session_state.session_corpus
         with process_col2:
             process_button = st.button("Process", use_container_width=True)
         
-        if process_button:
+        corpus = None
+        if is_valid_corpus_name(corpus_name):
+            corpus = get_corpus_store().open(corpus_name)
+        else:
+            st.markdown(
+                """
+                <div class='error-message'>
+                    ❌ Corpus names are up to 64 letters, digits, '_', '.' or '-', starting with a letter or digit
+                </div>
+                """,
+                unsafe_allow_html=True
+            )
+        
+        if process_button and corpus is not None:
             if input_data:
                 try:
                     with st.spinner("Processing documents..."):
-                        vectorstore = process_input(input_type, input_data)
-                        st.session_state["vectorstore"] = vectorstore
+                        ingest_stats, ingest_trace = process_input(input_type, input_data, corpus_name)
                         st.markdown(
                             f"""
                             <div class='success-message'>
@@ -86,6 +204,16 @@ def main():
                             """,
                             unsafe_allow_html=True
                         )
+                        if ingest_stats.get("skipped_uploads"):
+                            st.caption(f"Skipped {ingest_stats['skipped_uploads']} unchanged upload(s) already in '{corpus_name}'")
+                        if ingest_stats["chunks"]:
+                            st.caption(
+                                f"Embedded {ingest_stats['chunks']} chunks in {ingest_stats['batches']} batches "
+                                f"({ingest_stats['chunks_per_second']:.1f} chunks/s, "
+                                f"{ingest_stats['cache_hits']} cached, {ingest_stats['cache_misses']} new)"
+                                + (f" · {ingest_stats['duplicate_chunks']} duplicate chunks collapsed" if ingest_stats.get('duplicate_chunks') else "")
+                            )
+                        render_performance(ingest_trace)
                 except Exception as e:
                     st.markdown(
                         f"""
@@ -107,18 +235,33 @@ def main():
 
         st.markdown("---")
 
+        # Manage the documents stored in the selected corpus
+        if corpus is not None and corpus.documents:
+            with st.expander(f"Documents in '{corpus_name}' ({len(corpus.documents)})"):
+                to_remove = st.multiselect("Select documents to remove", corpus.documents)
+                if st.button("Remove selected") and to_remove:
+                    corpus.remove_documents(to_remove)
+                    st.rerun()
+
         # Question answering section (once documents are processed)
-        if "vectorstore" in st.session_state:
+        if corpus is not None and corpus.documents:
             st.markdown("### 🤔 Ask Your Question")
             query = st.text_input("What would you like to know?", placeholder="Enter your question here...")
             
             if st.button("Submit Question", use_container_width=False) and query.strip():
-                with st.spinner("Generating answer..."):
-                    answer, context, metrics = answer_question(st.session_state["vectorstore"], query, OPENROUTER_API_KEY)
-                    
-                    st.markdown("### 💡 Answer")
-                    st.markdown(f"<div class='answer-box'>{answer}</div>", unsafe_allow_html=True)
-                    
+                st.markdown("### 💡 Answer")
+                answer_placeholder = st.empty()
+                try:
+                    with st.spinner("Retrieving context..."):
+                        stream = stream_answer(corpus.vectorstore, query, OPENROUTER_API_KEY, corpus_key=(corpus.name, corpus.version))
+                    render_stream(answer_placeholder, stream)
+                    render_latency(stream)
+                    metrics = stream.metrics
+                except Exception as e:
+                    answer_placeholder.markdown(f"<div class='answer-box'>An error occurred: {str(e)}</div>", unsafe_allow_html=True)
+                    stream = metrics = None
+                
+                if metrics:
                     with st.expander("View Metrics"):
                         st.markdown("### Performance Metrics")
                         metrics_cols = st.columns(4)
@@ -130,6 +273,8 @@ def main():
                             # st.markdown(f"<div class='metric-card'><b>BLEU Score</b><br>{metrics['bleu']:.2%}</div>", unsafe_allow_html=True)
                         with metrics_cols[3]:
                             st.markdown(f"<div class='metric-card'><b>ROUGE-L</b><br>{metrics['rouge']['rougeL']:.2%}</div>", unsafe_allow_html=True)
+                if stream is not None:
+                    render_performance(stream.trace)
 
     # YouTube Q&A tab
     with tab2:
@@ -141,7 +286,7 @@ def main():
         # Display embedded YouTube video when URL is provided
         if video_url:
             try:
-                video_id = YouTubeQASystem(YOUTUBE_API_KEY, OPENROUTER_API_KEY).extract_video_id(video_url)
+                video_id = YouTubeQASystem.extract_video_id(video_url)
                 if video_id:
                     st.markdown(f"""
                         <div style="display: flex; justify-content: center; margin: 1rem 0;">
@@ -159,30 +304,43 @@ def main():
         question = st.text_input("Your Question", placeholder="What is this video about?")
         
         if st.button("Get Answer", use_container_width=False) and video_url and question:
-            youtube_qa = YouTubeQASystem(YOUTUBE_API_KEY, OPENROUTER_API_KEY)
+            youtube_qa = get_youtube_qa()
             
-            with st.spinner("Processing video and generating answer..."):
-                response = asyncio.run(youtube_qa.process_video(video_url, question))
+            with st.spinner("Fetching video information..."):
+                response = asyncio.run(youtube_qa.process_video_stream(video_url, question))
                 
-                if "error" in response:
-                    st.markdown(
+            if "error" in response:
+                st.markdown(
+                    f"""
+                    <div class='error-message'>
+                        ❌ Error: {response['error']}
+                    </div>
+                    """,
+                    unsafe_allow_html=True
+                )
+            else:
+                st.markdown(f"### {response['video_title']}")
+                answer_placeholder = st.empty()
+                try:
+                    asyncio.run(render_stream_async(answer_placeholder, response["stream"]))
+                    render_latency(response["stream"])
+                    render_performance(response["stream"].trace)
+                except Exception as e:
+                    answer_placeholder.markdown(
                         f"""
                         <div class='error-message'>
-                            ❌ Error: {response['error']}
+                            ❌ Error: {str(e)}
                         </div>
                         """,
                         unsafe_allow_html=True
                     )
-                else:
-                    st.markdown(f"### {response['video_title']}")
-                    st.markdown(f"<div class='answer-box'>{response['answer']}</div>", unsafe_allow_html=True)
-                    
-                    if "thumbnail" in response and response["thumbnail"]:
-                        with st.expander("Video Information"):
-                            st.image(response["thumbnail"], width=300)
-                            st.caption(f"Generated at: {response['timestamp']}")
-                    else:
+                
+                if "thumbnail" in response and response["thumbnail"]:
+                    with st.expander("Video Information"):
+                        st.image(response["thumbnail"], width=300)
                         st.caption(f"Generated at: {response['timestamp']}")
+                else:
+                    st.caption(f"Generated at: {response['timestamp']}")
 
     # Footer
     st.markdown("""
@@ -190,6 +348,7 @@ def main():
         AskIt - A MultiModal Chatbot
     </div>
     """, unsafe_allow_html=True)
+    startup.mark_rendered()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,228 @@
+"""Headless HTTP API for document and YouTube question answering
+
+All clients share the process-wide embedding registry, corpus store, answer
+cache and LLM scheduler. Corpora live on disk under CORPUS_DIR and survive
+restarts. The corpus store caches manifests in memory and assigns segment
+ids without cross-process locking, so run a single instance per CORPUS_DIR;
+to scale out, give each instance its own directory and route by corpus name.
+
+    python service.py --port 8080
+
+Endpoints:
+    GET    /health
+    GET    /stats
+    GET    /corpora
+    GET    /corpora/{name}
+    POST   /corpora/{name}/documents   multipart (input_type + files) or JSON {"input_type", "data"}
+    DELETE /corpora/{name}/documents   JSON {"keys": [...]}
+    POST   /corpora/{name}/query       JSON {"question"}
+    POST   /youtube                    JSON {"url", "question"}
+"""
+import argparse
+import asyncio
+import startup
+from aiohttp import web
+from config import (
+    OPENROUTER_API_KEY, YOUTUBE_API_KEY, EMBEDDING_MODEL, SERVICE_HOST, SERVICE_PORT,
+    SERVICE_BATCH_WINDOW, SERVICE_MAX_BATCH, SERVICE_MAX_UPLOAD_MB
+)
+from document_qa import process_input, answer_question_async
+from extraction import NamedUpload
+from youtube_qa import YouTubeQASystem
+from embeddings import get_registry, encode_batch, cache_stats
+from corpus_store import get_corpus_store
+from answer_cache import get_answer_cache
+from llm_scheduler import get_scheduler
+
+startup.mark_imported()
+
+FILE_TYPES = ("PDF", "DOCX", "TXT", "Image")
+INPUT_TYPES = FILE_TYPES + ("Link", "Text")
+
+class QueryBatcher:
+    """Coalesce query embeddings that arrive within a short window into one forward pass"""
+    def __init__(self, model_name=EMBEDDING_MODEL, window=SERVICE_BATCH_WINDOW, max_batch=SERVICE_MAX_BATCH):
+        self.model_name = model_name
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = []
+        self._timer = None
+        self.queries = 0
+        self.batches = 0
+        self.largest_batch = 0
+
+    async def embed(self, text):
+        """Return the query embedding as a list of floats"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._encode(batch))
+
+    async def _encode(self, batch):
+        try:
+            matrix = await asyncio.to_thread(encode_batch, [text for text, _ in batch], self.model_name)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.queries += len(batch)
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for (_, future), vector in zip(batch, matrix):
+            if not future.done():
+                future.set_result(vector.tolist())
+
+    def stats(self):
+        return {
+            'queries': self.queries,
+            'batches': self.batches,
+            'mean_batch': self.queries / self.batches if self.batches else 0.0,
+            'largest_batch': self.largest_batch
+        }
+
+def _batcher(app, model_name):
+    batchers = app["batchers"]
+    if model_name not in batchers:
+        batchers[model_name] = QueryBatcher(model_name)
+    return batchers[model_name]
+
+def _corpus_info(corpus):
+    return {
+        'name': corpus.name,
+        'version': corpus.version,
+        'vectors': corpus.vector_count,
+        'documents': sorted(corpus.documents)
+    }
+
+async def _existing_corpus(request):
+    name = request.match_info["name"]
+    store = get_corpus_store()
+    if not store.exists(name):
+        raise web.HTTPNotFound(reason=f"Corpus '{name}' does not exist")
+    return await asyncio.to_thread(store.open, name)
+
+async def _json_body(request):
+    try:
+        return await request.json()
+    except ValueError:
+        raise web.HTTPBadRequest(reason="Request body must be JSON")
+
+async def _read_ingest(request):
+    """Return (input_type, input_data) from a multipart upload or a JSON body"""
+    if request.content_type.startswith("multipart/"):
+        form = await request.post()
+        input_type = form.get("input_type")
+        files = [NamedUpload(field.file.read(), field.filename) for field in form.getall("files", []) if hasattr(field, "file")]
+        if input_type not in FILE_TYPES or not files:
+            raise web.HTTPBadRequest(reason=f"Multipart uploads need input_type in {FILE_TYPES} and one or more 'files'")
+        return input_type, files
+    body = await _json_body(request)
+    input_type, data = body.get("input_type"), body.get("data")
+    if input_type == "Link" and isinstance(data, list) and data:
+        return input_type, [str(url) for url in data]
+    if input_type == "Text" and isinstance(data, str) and data.strip():
+        return input_type, data
+    raise web.HTTPBadRequest(reason="JSON ingestion needs input_type 'Link' with a list of URLs or 'Text' with a string")
+
+async def health(request):
+    return web.json_response({'status': 'ok', 'model_loaded': get_registry().is_loaded()})
+
+async def stats(request):
+    return web.json_response({
+        'scheduler': get_scheduler(OPENROUTER_API_KEY).stats(),
+        'answer_cache': get_answer_cache().stats(),
+        'corpora': get_corpus_store().stats(),
+        'embedding_cache': cache_stats() if get_registry().is_loaded() else None,
+        'query_batching': {name: batcher.stats() for name, batcher in request.app["batchers"].items()},
+        'startup': startup.report()
+    })
+
+async def list_corpora(request):
+    return web.json_response({'corpora': get_corpus_store().list()})
+
+async def get_corpus(request):
+    return web.json_response(_corpus_info(await _existing_corpus(request)))
+
+async def ingest(request):
+    name = request.match_info["name"]
+    input_type, input_data = await _read_ingest(request)
+    try:
+        ingest_stats, _ = await asyncio.to_thread(process_input, input_type, input_data, name)
+    except ValueError as e:
+        raise web.HTTPBadRequest(reason=str(e))
+    corpus = get_corpus_store().open(name)
+    return web.json_response({**_corpus_info(corpus), 'ingest_stats': ingest_stats})
+
+async def remove_documents(request):
+    corpus = await _existing_corpus(request)
+    keys = (await _json_body(request)).get("keys")
+    if not isinstance(keys, list):
+        raise web.HTTPBadRequest(reason="Body must contain a list of document 'keys'")
+    await asyncio.to_thread(corpus.remove_documents, keys)
+    return web.json_response(_corpus_info(corpus))
+
+async def query(request):
+    corpus = await _existing_corpus(request)
+    question = str((await _json_body(request)).get("question", "")).strip()
+    if not question:
+        raise web.HTTPBadRequest(reason="Body must contain a non-empty 'question'")
+    vectorstore = await asyncio.to_thread(lambda: corpus.vectorstore)
+    query_vector = await _batcher(request.app, corpus.manifest["model"]).embed(question)
+    answer, context, metrics = await answer_question_async(
+        vectorstore, question, OPENROUTER_API_KEY, corpus_key=(corpus.name, corpus.version), query_vector=query_vector
+    )
+    return web.json_response({'answer': answer, 'context': context, 'metrics': metrics, 'corpus_version': corpus.version})
+
+async def youtube(request):
+    body = await _json_body(request)
+    url, question = body.get("url"), body.get("question")
+    if not url or not question:
+        raise web.HTTPBadRequest(reason="Body must contain 'url' and 'question'")
+    response = await request.app["youtube_qa"].process_video(url, question)
+    if "error" in response:
+        return web.json_response(response, status=400)
+    return web.json_response(response)
+
+async def _on_startup(app):
+    # Import heavy libraries and load the model in the background so the
+    # first requests do not all pay for it
+    startup.warm_up()
+
+def create_app():
+    app = web.Application(client_max_size=SERVICE_MAX_UPLOAD_MB * 1024 * 1024)
+    app["batchers"] = {}
+    app["youtube_qa"] = YouTubeQASystem(YOUTUBE_API_KEY, OPENROUTER_API_KEY)
+    app.on_startup.append(_on_startup)
+    app.add_routes([
+        web.get("/health", health),
+        web.get("/stats", stats),
+        web.get("/corpora", list_corpora),
+        web.get("/corpora/{name}", get_corpus),
+        web.post("/corpora/{name}/documents", ingest),
+        web.delete("/corpora/{name}/documents", remove_documents),
+        web.post("/corpora/{name}/query", query),
+        web.post("/youtube", youtube),
+    ])
+    return app
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AskIt question answering API")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    args = parser.parse_args(argv)
+    web.run_app(create_app(), host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
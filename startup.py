@@ -0,0 +1,94 @@
+"""Start-up timing and the optional background warm-up
+
+Heavy libraries are imported where they are first used, so importing the
+app is cheap. warm_up() pulls them in (and loads the embedding model) on a
+background thread while the first page renders.
+
+    python startup.py --max-seconds 2    # fail if a cold import of the app gets slower
+"""
+import os
+import sys
+import time
+import argparse
+import importlib
+import threading
+import subprocess
+from config import STARTUP_WARMUP
+
+STARTED = time.perf_counter()
+
+HEAVY_MODULES = (
+    "faiss",
+    "langchain_community.vectorstores",
+    "langchain.text_splitter",
+    "sentence_transformers",
+    "nltk.translate.bleu_score",
+    "rouge_score.rouge_scorer",
+)
+
+_timings = {'imports': None, 'first_render': None, 'warm_up': None, 'modules': {}}
+_lock = threading.Lock()
+_warm_thread = None
+
+def mark_imported():
+    """Record how long the app took to import, the first time only"""
+    if _timings['imports'] is None:
+        _timings['imports'] = time.perf_counter() - STARTED
+
+def mark_rendered():
+    """Record the time to the end of the first full render, the first time only"""
+    if _timings['first_render'] is None:
+        _timings['first_render'] = time.perf_counter() - STARTED
+
+def warm_up(force=False):
+    """Import heavy modules and load the embedding model on a background thread"""
+    global _warm_thread
+    if not (STARTUP_WARMUP or force):
+        return None
+    with _lock:
+        if _warm_thread is None:
+            _warm_thread = threading.Thread(target=_warm, name="startup-warm-up", daemon=True)
+            _warm_thread.start()
+        return _warm_thread
+
+def _warm():
+    started = time.perf_counter()
+    for name in HEAVY_MODULES:
+        module_started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception:
+            # Best effort; a missing optional library surfaces on first real use
+            continue
+        _timings['modules'][name] = time.perf_counter() - module_started
+    from embeddings import get_registry
+    get_registry().warm_up().join()
+    _timings['warm_up'] = time.perf_counter() - started
+
+def report():
+    """Seconds to import the app, to the first render and to finish warming up"""
+    return {**_timings, 'modules': dict(_timings['modules'])}
+
+def measure_cold_import(module, python=sys.executable):
+    """Import a module in a fresh interpreter and return the seconds it took"""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    result = subprocess.run(
+        [python, "-c", code], capture_output=True, text=True, check=True,
+        env={**os.environ, "STARTUP_WARMUP": "0"}, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold import time of the app modules")
+    parser.add_argument("modules", nargs="*", default=["document_qa", "youtube_qa", "main"])
+    parser.add_argument("--max-seconds", type=float, default=None, help="Exit non-zero if any import takes longer")
+    args = parser.parse_args(argv)
+    slow = False
+    for module in args.modules:
+        seconds = measure_cold_import(module)
+        slow = slow or (args.max_seconds is not None and seconds > args.max_seconds)
+        print(f"{module:<16}{seconds:8.3f}s")
+    return 1 if slow else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
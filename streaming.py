@@ -0,0 +1,48 @@
+import time
+
+class AnswerStream:
+    """Iterate over answer tokens while recording time-to-first-token and latency
+
+    Once the stream is exhausted `answer` holds the full text and the
+    optional on_complete callback has run (e.g. to compute metrics).
+    """
+    def __init__(self, tokens, on_complete=None, started=None):
+        self._tokens = tokens
+        self._on_complete = on_complete
+        self.started = started if started is not None else time.perf_counter()
+        self.answer = ""
+        self.time_to_first_token = None
+        self.latency = None
+        self.metrics = None
+        self.context = None
+        self.cache_hit = None
+        self.trace = None
+        self.done = False
+
+    def _token(self, token):
+        if self.time_to_first_token is None:
+            self.time_to_first_token = time.perf_counter() - self.started
+        self.answer += token
+        return token
+
+    def _finish(self):
+        if self.time_to_first_token is None:
+            self.time_to_first_token = time.perf_counter() - self.started
+        self.latency = time.perf_counter() - self.started
+        if self._on_complete is not None:
+            self._on_complete(self)
+        self.done = True
+
+    def __iter__(self):
+        for token in self._tokens:
+            if token:
+                yield self._token(token)
+        self._finish()
+
+class AsyncAnswerStream(AnswerStream):
+    """AnswerStream over an async iterator of tokens"""
+    async def __aiter__(self):
+        async for token in self._tokens:
+            if token:
+                yield self._token(token)
+        self._finish()
@@ -0,0 +1,33 @@
+import os
+import sys
+import tempfile
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Configuration is read at import time, so point everything at scratch
+# directories before any project module is imported
+_WORKDIR = tempfile.mkdtemp(prefix="askit-tests-")
+os.environ.update({
+    "CORPUS_DIR": os.path.join(_WORKDIR, "corpora"),
+    "EMBEDDING_CACHE_DIR": os.path.join(_WORKDIR, "embeddings"),
+    "OCR_CACHE_DIR": os.path.join(_WORKDIR, "ocr"),
+    "LINK_CACHE_DIR": os.path.join(_WORKDIR, "links"),
+    "HF_HUB_OFFLINE": "1",
+    "TRANSFORMERS_OFFLINE": "1",
+    "STARTUP_WARMUP": "0",
+    "TRACING_ENABLED": "0",
+})
+
+@pytest.fixture(scope="session")
+def hashing_embeddings():
+    """Serve the default embedding model from the offline hashing embedder"""
+    pytest.importorskip("numpy")
+    pytest.importorskip("dotenv")
+    from benchmarks.hashing_embeddings import HashingEmbeddings
+    from embeddings import get_registry
+    from config import EMBEDDING_MODEL
+    embeddings = HashingEmbeddings()
+    get_registry().register(EMBEDDING_MODEL, embeddings)
+    return embeddings
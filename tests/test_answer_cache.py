@@ -0,0 +1,63 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("dotenv")
+
+from answer_cache import AnswerCache
+
+def _vector(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+def _put(cache, corpus_key, query, vector, answer="answer"):
+    cache.put(corpus_key, query, vector, answer, "context", {}, latency=1.5)
+
+def test_exact_match_ignores_case_and_whitespace():
+    cache = AnswerCache(threshold=0.95)
+    _put(cache, ("docs", 1), "What is the revenue?", _vector(1, 0))
+
+    entry, kind = cache.get(("docs", 1), "  what IS the   revenue? ")
+    assert (entry["answer"], kind) == ("answer", "exact")
+    assert cache.stats()["seconds_saved"] == 1.5
+
+def test_semantic_match_needs_the_threshold():
+    cache = AnswerCache(threshold=0.95)
+    _put(cache, ("docs", 1), "What is the revenue?", _vector(1, 0))
+
+    assert cache.get(("docs", 1), "How much did we earn?", _vector(1, 0.1))[1] == "semantic"
+    assert cache.get(("docs", 1), "Who is the CEO?", _vector(0, 1)) == (None, None)
+
+def test_newer_version_drops_older_entries():
+    cache = AnswerCache()
+    _put(cache, ("docs", 1), "q", _vector(1, 0))
+    assert cache.get(("docs", 2), "q") == (None, None)
+    # A late put for the old version is not stored
+    _put(cache, ("docs", 1), "q", _vector(1, 0))
+    assert cache.stats()["entries"] == 0
+
+def test_entries_expire_after_the_ttl():
+    cache = AnswerCache(ttl=-1)
+    _put(cache, ("docs", 1), "q", _vector(1, 0))
+    assert cache.get(("docs", 1), "q") == (None, None)
+
+def test_least_recently_used_entries_are_evicted():
+    cache = AnswerCache(max_entries=2)
+    for query in ("a", "b"):
+        _put(cache, ("docs", 1), query, _vector(1, 0))
+    cache.get(("docs", 1), "a")
+    _put(cache, ("docs", 1), "c", _vector(1, 0))
+
+    assert cache.get(("docs", 1), "b") == (None, None)
+    assert cache.get(("docs", 1), "a")[1] == "exact"
+
+@pytest.mark.parametrize("corpus", ["docs", None])
+def test_recreated_corpus_is_cached_from_version_one(corpus):
+    cache = AnswerCache()
+    _put(cache, ("docs", 5), "q", _vector(1, 0))
+    _put(cache, ("other", 3), "q", _vector(1, 0))
+    cache.invalidate(corpus)
+
+    _put(cache, ("docs", 1), "q", _vector(1, 0), answer="fresh")
+    entry, kind = cache.get(("docs", 1), "q")
+    assert (entry["answer"], kind) == ("fresh", "exact")
+    assert (cache.get(("other", 3), "q")[0] is None) == (corpus is None)
@@ -0,0 +1,71 @@
+import pytest
+
+pytest.importorskip("dotenv")
+
+import context_packing
+from context_packing import merge_chunks, pack_context
+
+PAGE = " ".join(f"word{i}" for i in range(200))
+
+class Doc:
+    def __init__(self, text, source="a.pdf", page=1, start=None, end=None):
+        self.page_content = text
+        self.metadata = {"source": source, "page": page}
+        if start is not None:
+            self.metadata.update(start_index=start, end_index=end)
+
+def span(start, end, **kwargs):
+    return Doc(PAGE[start:end], start=start, end=end, **kwargs)
+
+@pytest.fixture(autouse=True)
+def heuristic_tokens(monkeypatch):
+    # ~4 characters per token, so results do not depend on tiktoken being cached
+    monkeypatch.setattr(context_packing, "_encoding", lambda: None)
+
+def test_overlapping_chunks_are_merged_once():
+    blocks = merge_chunks([span(40, 120), span(0, 60)])
+    assert blocks == [(PAGE[0:120], 0, 2)]
+
+def test_adjacent_chunks_keep_a_paragraph_break():
+    blocks = merge_chunks([span(0, 50), span(52, 90)])
+    assert blocks == [(PAGE[0:50] + "\n\n" + PAGE[52:90], 0, 2)]
+
+def test_distant_chunks_and_other_pages_stay_separate():
+    blocks = merge_chunks([span(0, 50), span(100, 150), span(0, 50, page=2)])
+    assert [(rank, count) for _, rank, count in blocks] == [(0, 1), (1, 1), (2, 1)]
+
+def test_blocks_are_ordered_by_their_best_rank():
+    docs = [
+        Doc("no offsets here"),
+        span(300, 400),
+        Doc("other source", source="b.pdf", start=0, end=12),
+        span(250, 320),
+    ]
+    blocks = merge_chunks(docs)
+    assert [(text, rank, count) for text, rank, count in blocks] == [
+        ("no offsets here", 0, 1),
+        (PAGE[250:400], 1, 2),
+        ("other source", 2, 1),
+    ]
+
+def test_block_that_does_not_fit_is_truncated_when_enough_budget_remains():
+    docs = [Doc("x" * 100), Doc(PAGE[:400], source="b.pdf")]
+    context, report = pack_context(docs, budget=60, min_truncated=20)
+
+    first, second = report["decisions"]
+    assert first == {'rank': 0, 'chunks': 1, 'tokens': 25, 'action': "included"}
+    assert second["action"] == "truncated" and second["tokens"] == 100
+    assert 0 < second["kept"] <= 35
+    assert report["context_tokens"] == 25 + second["kept"] <= 60
+    assert context.startswith("x" * 100 + "\n\n" + PAGE[:10])
+    assert report["truncated"] == 1 and report["dropped"] == 0
+    assert report["tokenizer"] == "heuristic"
+
+def test_block_that_does_not_fit_is_dropped_below_the_minimum():
+    docs = [Doc("x" * 100), Doc(PAGE[:400], source="b.pdf"), Doc("y" * 20, source="c.pdf")]
+    context, report = pack_context(docs, budget=60, min_truncated=40)
+
+    assert [d["action"] for d in report["decisions"]] == ["included", "dropped", "included"]
+    assert context == "x" * 100 + "\n\n" + "y" * 20
+    assert report["context_tokens"] == 30
+    assert (report["truncated"], report["dropped"]) == (0, 1)
@@ -0,0 +1,125 @@
+import pytest
+
+for module in ("numpy", "faiss", "langchain_core", "langchain_community"):
+    pytest.importorskip(module)
+
+def _chunks(key, texts):
+    from langchain_core.documents import Document
+    for text in texts:
+        yield key, Document(page_content=text, metadata={"source": key})
+
+def test_replacing_a_document_swaps_its_chunks(hashing_embeddings):
+    from corpus_store import get_corpus_store
+    corpus = get_corpus_store().open("test-replace")
+    corpus.add_chunks(_chunks("a.txt", ["first version of the notes", "more of the first version"]), hashes={"a.txt": "v1"})
+    corpus.add_chunks(_chunks("a.txt", ["second version of the notes"]), hashes={"a.txt": "v2"})
+
+    assert corpus.documents == ["a.txt"]
+    assert corpus.content_hash("a.txt") == "v2"
+    assert corpus.vector_count == 1
+    assert len(corpus.manifest["segments"]) == 1
+
+def test_failed_replacement_keeps_the_stored_document(hashing_embeddings):
+    from corpus_store import get_corpus_store
+    corpus = get_corpus_store().open("test-replace-failure")
+    corpus.add_chunks(_chunks("a.txt", ["the original text"]), hashes={"a.txt": "v1"})
+    version = corpus.version
+
+    def failing():
+        yield from _chunks("a.txt", ["a replacement chunk"])
+        raise RuntimeError("extraction failed")
+
+    with pytest.raises(RuntimeError):
+        corpus.add_chunks(failing(), hashes={"a.txt": "v2"})
+
+    reopened = get_corpus_store().open("test-replace-failure")
+    assert reopened.documents == ["a.txt"]
+    assert reopened.content_hash("a.txt") == "v1"
+    assert reopened.version == version
+    assert reopened.vector_count == 1
+
+SHARED = [
+    "the quarterly report shows revenue growth across every region this year",
+    "customer retention improved after the new support policy was introduced",
+]
+
+def _twins(name):
+    """A corpus holding a.txt and b.txt with identical chunks; b.txt's are references to a.txt's"""
+    from itertools import chain
+    from corpus_store import get_corpus_store
+    corpus = get_corpus_store().open(name)
+    stats = corpus.add_chunks(chain(_chunks("a.txt", SHARED), _chunks("b.txt", SHARED)), dedup=True)
+    assert stats["duplicate_chunks"] == len(SHARED)
+    assert corpus.vector_count == len(SHARED)
+    corpus.vectorstore  # removal must also update the loaded view
+    return corpus
+
+def test_removing_a_fully_deduplicated_document(hashing_embeddings):
+    corpus = _twins("test-dedup-remove")
+    version = corpus.version
+    corpus.remove_documents(["b.txt"])
+
+    assert corpus.documents == ["a.txt"]
+    assert corpus.version == version + 1
+    assert corpus.vector_count == len(SHARED)
+    doc = corpus.vectorstore.similarity_search(SHARED[0], k=1)[0]
+    assert doc.metadata["source"] == "a.txt"
+    assert doc.metadata["duplicates"] == []
+
+def test_replacing_a_fully_deduplicated_document(hashing_embeddings):
+    corpus = _twins("test-dedup-replace")
+    corpus.add_chunks(_chunks("b.txt", ["an entirely different note about storage costs"]), hashes={"b.txt": "v2"})
+
+    assert corpus.documents == ["a.txt", "b.txt"]
+    assert corpus.content_hash("b.txt") == "v2"
+    assert corpus.vector_count == len(SHARED) + 1
+    sources = {doc.metadata["source"] for doc in corpus.vectorstore.similarity_search(SHARED[1], k=3)}
+    assert sources == {"a.txt", "b.txt"}
+
+def test_removing_the_original_keeps_chunks_for_the_duplicate(hashing_embeddings):
+    corpus = _twins("test-dedup-original")
+    corpus.remove_documents(["a.txt"])
+
+    assert corpus.documents == ["b.txt"]
+    assert corpus.vector_count == len(SHARED)
+    doc = corpus.vectorstore.similarity_search(SHARED[0], k=1)[0]
+    assert doc.metadata["source"] == "b.txt"
+    assert doc.metadata["duplicates"] == []
+
+@pytest.mark.parametrize("name", ["..", ".", "", "a/b", "../escape", "my corpus", "-flag", "x" * 65])
+def test_invalid_corpus_names_are_rejected(tmp_path, name):
+    from corpus_store import CorpusStore
+    store = CorpusStore(root=str(tmp_path / "corpora"))
+    with pytest.raises(ValueError):
+        store.open(name)
+    assert not store.exists(name)
+    assert not (tmp_path / "manifest.json").exists()
+
+@pytest.mark.parametrize("name", ["default", "Team_docs", "q3-2025.reports"])
+def test_valid_corpus_names_map_to_their_own_directory(tmp_path, name):
+    from corpus_store import CorpusStore
+    store = CorpusStore(root=str(tmp_path))
+    assert store.open(name).directory == str(tmp_path / name)
+
+def test_one_handle_per_corpus_directory(tmp_path):
+    import os
+    from corpus_store import CorpusStore
+    store = CorpusStore(root=str(tmp_path))
+    docs = store.open("docs")
+    os.makedirs(docs.directory)
+    os.symlink(docs.directory, str(tmp_path / "alias"))
+
+    assert store.open("docs") is docs
+    assert store.open("alias") is docs
+    assert store.stats()["unloaded"] == 1
+
+def test_deleted_corpus_reopens_empty(tmp_path, hashing_embeddings):
+    from corpus_store import CorpusStore
+    store = CorpusStore(root=str(tmp_path))
+    corpus = store.open("docs")
+    corpus.add_chunks(_chunks("a.txt", ["some text to store"]))
+    store.delete("docs")
+
+    reopened = store.open("docs")
+    assert reopened is not corpus
+    assert reopened.documents == []
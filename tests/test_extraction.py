@@ -0,0 +1,20 @@
+import pytest
+
+pytest.importorskip("dotenv")
+
+def test_txt_pieces_end_at_boundaries():
+    from extraction import _iter_txt, NamedUpload
+    paragraphs = [" ".join(f"word{p}-{w}" for w in range(30)) for p in range(20)]
+    text = "\n\n".join(paragraphs)
+    pieces = list(_iter_txt(NamedUpload(text.encode("utf-8"), "notes.txt"), page_chars=500))
+
+    assert "".join(piece.text for piece in pieces) == text
+    assert [piece.page for piece in pieces] == list(range(1, len(pieces) + 1))
+    for piece in pieces[:-1]:
+        assert len(piece.text) <= 500
+        assert piece.text.endswith("\n\n")
+
+def test_txt_without_whitespace_falls_back_to_the_limit():
+    from extraction import _iter_txt, NamedUpload
+    pieces = list(_iter_txt(NamedUpload(b"x" * 1200, "notes.txt"), page_chars=500))
+    assert [len(piece.text) for piece in pieces] == [500, 500, 200]
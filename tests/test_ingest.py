@@ -0,0 +1,55 @@
+import pytest
+
+for module in ("numpy", "faiss", "langchain", "langchain_community"):
+    pytest.importorskip(module)
+
+def test_pdf_ingest(hashing_embeddings):
+    pytest.importorskip("PyPDF2")
+    from benchmarks.corpus_gen import generate
+    from document_qa import process_input
+    from corpus_store import get_corpus_store
+
+    uploads = generate("PDF", files=1, pages_per_file=3)
+    stats, _ = process_input("PDF", uploads, "test-pdf-ingest")
+
+    assert stats["chunks"] > 0
+    corpus = get_corpus_store().open("test-pdf-ingest")
+    assert corpus.documents == ["synthetic-0.pdf"]
+
+def test_unchanged_upload_is_skipped_and_changed_one_reembedded(hashing_embeddings):
+    from extraction import NamedUpload
+    from document_qa import process_input
+    from corpus_store import get_corpus_store
+
+    def upload(text):
+        return [NamedUpload(text.encode("utf-8"), "notes.txt")]
+
+    stats, _ = process_input("TXT", upload("Revenue grew in every region this quarter."), "test-reingest")
+    corpus = get_corpus_store().open("test-reingest")
+    version, digest = corpus.version, corpus.content_hash("notes.txt")
+    assert stats["chunks"] > 0 and stats["skipped_uploads"] == 0
+
+    stats, _ = process_input("TXT", upload("Revenue grew in every region this quarter."), "test-reingest")
+    assert stats["skipped_uploads"] == 1
+    assert stats["chunks"] == 0
+    assert corpus.version == version
+
+    stats, _ = process_input("TXT", upload("Costs fell sharply after the warehouse move."), "test-reingest")
+    assert stats["skipped_uploads"] == 0
+    assert stats["chunks"] > 0
+    assert corpus.version > version
+    assert corpus.content_hash("notes.txt") != digest
+    assert corpus.documents == ["notes.txt"]
+    assert "warehouse" in corpus.vectorstore.similarity_search("warehouse move", k=1)[0].page_content
+
+def test_pasted_text_is_added_once(hashing_embeddings):
+    from document_qa import process_input
+    from corpus_store import get_corpus_store
+
+    text = "The board approved the new travel policy."
+    process_input("Text", text, "test-reingest-text")
+    version = get_corpus_store().open("test-reingest-text").version
+
+    stats, _ = process_input("Text", text, "test-reingest-text")
+    assert stats["skipped_uploads"] == 1
+    assert get_corpus_store().open("test-reingest-text").version == version
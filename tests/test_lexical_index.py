@@ -0,0 +1,71 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("dotenv")
+
+from lexical_index import BM25Index, reciprocal_rank_fusion, term_counts
+
+def test_bm25_ranks_rarer_terms_higher_and_forgets_removed_ids():
+    index = BM25Index()
+    terms = {
+        1: term_counts("the penguin colony migrates every winter"),
+        2: term_counts("winter storms closed the harbour"),
+        3: term_counts("winter sales figures for the harbour shop"),
+    }
+    index.add(terms)
+
+    assert [vector_id for vector_id, _ in index.search("penguin winter", 3)][0] == 1
+    index.remove({1: terms[1]})
+    assert index.search("penguin", 3) == []
+    assert {vector_id for vector_id, _ in index.search("winter", 3)} == {2, 3}
+    assert len(index) == 2
+    assert index.total_length == sum(terms[2].values()) + sum(terms[3].values())
+
+def test_reciprocal_rank_fusion_favours_ids_ranked_in_several_lists():
+    # 3: 1/63 + 1/61 just beats 2: 1/62 + 1/62; single-list ids follow by rank
+    assert reciprocal_rank_fusion([[1, 2, 3], [3, 2, 4]], k=60) == [3, 2, 1, 4]
+    # Same list twice: fusion keeps its order
+    assert reciprocal_rank_fusion([[5, 6, 7], [5, 6, 7]]) == [5, 6, 7]
+
+def test_rrf_ties_between_equal_ranks_are_broken_by_first_appearance():
+    assert reciprocal_rank_fusion([[1, 2], [2, 1]]) == [1, 2]
+
+DOCUMENTS = {
+    "a.txt": ["penguin colonies migrate across the antarctic ice", "alpha report on seabird populations"],
+    "b.txt": ["volcano eruption forced the village evacuation", "bravo report on ash clouds"],
+    "c.txt": ["glacier melting raises sea levels worldwide", "charlie report on coastal flooding"],
+}
+
+def test_bm25_follows_adds_removals_and_compaction(hashing_embeddings):
+    for module in ("faiss", "langchain_core", "langchain_community"):
+        pytest.importorskip(module)
+    from langchain_core.documents import Document
+    from corpus_store import get_corpus_store
+    from lexical_index import hybrid_search
+
+    corpus = get_corpus_store().open("test-lexical")
+    for key, texts in DOCUMENTS.items():
+        corpus.add_chunks(((key, Document(page_content=text, metadata={"source": key})) for text in texts), dedup=False)
+    vectorstore = corpus.vectorstore
+    corpus.remove_documents(["b.txt"])
+    corpus.compact(force=True)
+
+    ids, _ = corpus.vectors()
+    lexical = corpus.vectorstore.lexical_index
+    assert corpus.vectorstore is vectorstore
+    assert set(lexical.lengths) == set(ids.tolist()) == set(vectorstore.index_to_docstore_id)
+    assert lexical.search("volcano eruption", 5) == []
+    hit, _ = lexical.search("glacier melting", 1)[0]
+    assert vectorstore.docstore.search(vectorstore.index_to_docstore_id[hit]).metadata["source"] == "c.txt"
+
+    query = "report on volcano ash"
+    docs = hybrid_search(vectorstore, query, vectorstore.embedding_function(query), k=4)
+    assert len(docs) == 4
+    assert {doc.metadata["source"] for doc in docs} == {"a.txt", "c.txt"}
+
+    # Rebuilding from disk gives the same index as the one kept in sync in memory
+    corpus.unload()
+    reloaded = corpus.vectorstore.lexical_index
+    assert reloaded.lengths == lexical.lengths
+    assert dict(reloaded.postings) == dict(lexical.postings)
+    assert reloaded.total_length == lexical.total_length
@@ -0,0 +1,116 @@
+import time
+import asyncio
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("bs4")
+pytest.importorskip("dotenv")
+
+URL = "https://example.com/report"
+PAGE = "<html><body><p>Quarterly revenue grew in every region.</p></body></html>"
+ETAG = '"v1"'
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+class Site:
+    """Serves one page with validators, answering 304 when they match"""
+    def __init__(self, headers=None):
+        self.headers = {"ETag": ETAG, "Last-Modified": LAST_MODIFIED} if headers is None else headers
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(request)
+        if request.headers.get("If-None-Match") == ETAG or request.headers.get("If-Modified-Since") == LAST_MODIFIED:
+            return httpx.Response(304)
+        return httpx.Response(200, text=PAGE, headers=self.headers)
+
+def _ingester(handler, cache_dir, **kwargs):
+    from link_ingest import LinkIngester
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return LinkIngester(client=client, cache_dir=str(cache_dir), **{"host_delay": 0, **kwargs})
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    import link_ingest
+    site = Site()
+    site.ingester = _ingester(site, tmp_path)
+    monkeypatch.setattr(link_ingest, "_ingester", site.ingester)
+    return site
+
+def test_second_fetch_revalidates_and_reuses_the_parsed_text(site):
+    first = asyncio.run(site.ingester.fetch(URL))
+    second = asyncio.run(site.ingester.fetch(URL))
+
+    assert (first.status, first.from_cache) == (200, False)
+    assert (second.status, second.from_cache) == (304, True)
+    assert second.text == first.text
+    assert "Quarterly revenue" in first.text
+    assert "If-None-Match" not in site.requests[0].headers
+    assert site.requests[1].headers["If-None-Match"] == ETAG
+    assert site.requests[1].headers["If-Modified-Since"] == LAST_MODIFIED
+    assert site.ingester.stats() == {'fetched': 1, 'not_modified': 1}
+
+def test_last_modified_alone_is_enough_to_revalidate(tmp_path):
+    site = Site(headers={"Last-Modified": LAST_MODIFIED})
+    ingester = _ingester(site, tmp_path)
+    asyncio.run(ingester.fetch(URL))
+    second = asyncio.run(ingester.fetch(URL))
+
+    assert second.from_cache
+    assert "If-None-Match" not in site.requests[1].headers
+    assert site.requests[1].headers["If-Modified-Since"] == LAST_MODIFIED
+
+def test_pages_without_validators_are_not_cached(tmp_path):
+    site = Site(headers={})
+    ingester = _ingester(site, tmp_path)
+    asyncio.run(ingester.fetch(URL))
+    second = asyncio.run(ingester.fetch(URL))
+
+    assert second.status == 200 and not second.from_cache
+    assert "If-Modified-Since" not in site.requests[1].headers
+
+def test_requests_are_capped_per_host(tmp_path):
+    in_flight, peak = {}, {}
+
+    async def handler(request):
+        host = request.url.host
+        in_flight[host] = in_flight.get(host, 0) + 1
+        peak[host] = max(peak.get(host, 0), in_flight[host])
+        await asyncio.sleep(0.02)
+        in_flight[host] -= 1
+        return httpx.Response(200, text=PAGE)
+
+    ingester = _ingester(handler, tmp_path, concurrency=8, per_host=2)
+    urls = [f"https://{host}.example.com/{i}" for host in ("a", "b") for i in range(6)]
+    results = asyncio.run(ingester.fetch_all(urls))
+
+    assert [result.url for result in results] == urls
+    assert peak == {"a.example.com": 2, "b.example.com": 2}
+
+def test_requests_to_one_host_are_spaced_out(tmp_path):
+    started = []
+
+    def handler(request):
+        started.append(time.monotonic())
+        return httpx.Response(200, text=PAGE)
+
+    ingester = _ingester(handler, tmp_path, per_host=1, host_delay=0.05)
+    asyncio.run(ingester.fetch_all([f"https://example.com/{i}" for i in range(3)]))
+
+    gaps = [later - earlier for earlier, later in zip(started, started[1:])]
+    assert all(gap >= 0.045 for gap in gaps)
+
+def test_unchanged_link_is_not_reingested(site, hashing_embeddings):
+    for module in ("faiss", "langchain_community"):
+        pytest.importorskip(module)
+    from document_qa import process_input
+    from corpus_store import get_corpus_store
+
+    stats, _ = process_input("Link", [URL], "test-links")
+    assert stats["chunks"] > 0
+    version = get_corpus_store().open("test-links").version
+
+    stats, _ = process_input("Link", [URL], "test-links")
+    assert site.ingester.not_modified == 1
+    assert stats["skipped_uploads"] == 1
+    assert stats["chunks"] == 0
+    assert get_corpus_store().open("test-links").version == version
@@ -0,0 +1,63 @@
+import time
+import asyncio
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("dotenv")
+
+from benchmarks.mock_llm import MockLLMServer
+
+MESSAGES = [{"role": "user", "content": "What changed?"}]
+ANSWER = "token0 token1 token2 "
+
+def _scheduler(server, **kwargs):
+    from llm_scheduler import LLMScheduler
+    return LLMScheduler("test-key", base_url=server.base_url, **kwargs)
+
+def test_rate_limited_request_is_retried_after_the_advertised_delay():
+    with MockLLMServer(tokens=3, first_token_delay=0, token_delay=0, rate_limit=1, retry_after=0.2) as server:
+        scheduler = _scheduler(server, max_retries=2)
+        started = time.perf_counter()
+        answer = scheduler.complete_sync(MESSAGES)
+        elapsed = time.perf_counter() - started
+
+    assert answer == ANSWER
+    assert server.requests == 2
+    assert elapsed >= 0.2
+    assert scheduler.stats()['retries'] == 1
+    assert scheduler.stats()['failures'] == 0
+
+def test_rate_limit_beyond_the_retry_budget_fails():
+    with MockLLMServer(tokens=3, first_token_delay=0, token_delay=0, rate_limit=5, retry_after=0) as server:
+        scheduler = _scheduler(server, max_retries=1)
+        with pytest.raises(ValueError):
+            scheduler.complete_sync(MESSAGES)
+
+    assert server.requests == 2
+    assert scheduler.stats()['failures'] == 1
+
+def test_identical_concurrent_requests_share_one_call():
+    with MockLLMServer(tokens=3, first_token_delay=0.2, token_delay=0) as server:
+        scheduler = _scheduler(server)
+
+        async def ask():
+            return await asyncio.gather(*(scheduler.complete(MESSAGES) for _ in range(3)))
+
+        answers = asyncio.run(ask())
+
+    assert answers == [ANSWER] * 3
+    assert server.requests == 1
+    assert scheduler.stats()['coalesced'] == 2
+
+def test_streamed_events_are_parsed_into_tokens():
+    with MockLLMServer(tokens=3, first_token_delay=0, token_delay=0) as server:
+        scheduler = _scheduler(server)
+        tokens = list(scheduler.stream_sync(MESSAGES))
+
+        async def collect():
+            return [token async for token in scheduler.astream(MESSAGES)]
+
+        async_tokens = asyncio.run(collect())
+
+    assert tokens == ["token0 ", "token1 ", "token2 "]
+    assert async_tokens == tokens
@@ -0,0 +1,11 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("dotenv")
+
+def test_nlist_is_bounded_by_the_training_sample():
+    from vector_index import _nlist
+    assert _nlist(10_000, sample_size=100_000) == 256
+    # 4*sqrt(n) would ask for 5656 lists; a 100k sample only supports 2564
+    assert _nlist(2_000_000, sample_size=100_000) == 100_000 // 39
+    assert _nlist(10, sample_size=100_000) == 1
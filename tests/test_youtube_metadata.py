@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+
+pytest.importorskip("dotenv")
+
+class FakeYouTube:
+    """Stands in for the discovery client, recording every videos().list call"""
+    def __init__(self, missing=()):
+        self.calls = []
+        self.missing = set(missing)
+
+    def videos(self):
+        return self
+
+    def list(self, part, id, maxResults):
+        ids = id.split(",")
+        self.calls.append(ids)
+        items = [{'id': video_id, 'snippet': {'title': f"Video {video_id}"}} for video_id in ids if video_id not in self.missing]
+        return _Request({'items': items})
+
+class _Request:
+    def __init__(self, response):
+        self.response = response
+
+    def execute(self):
+        return self.response
+
+def _service(youtube, **kwargs):
+    from youtube_metadata import VideoMetadataService
+    return VideoMetadataService(youtube=youtube, **{"ttl": 60, "batch_window": 0.01, **kwargs})
+
+def test_concurrent_lookups_share_one_api_call():
+    youtube = FakeYouTube()
+    service = _service(youtube)
+
+    async def lookups():
+        return await asyncio.gather(service.get("a"), service.get("b"), service.get("a"), service.get("c"))
+
+    items = asyncio.run(lookups())
+    assert [item['id'] for item in items] == ["a", "b", "a", "c"]
+    assert youtube.calls == [["a", "b", "c"]]
+    assert service.api_calls == 1
+
+def test_api_calls_carry_at_most_fifty_ids():
+    youtube = FakeYouTube()
+    service = _service(youtube)
+    ids = [f"v{i}" for i in range(120)]
+
+    items = asyncio.run(service.get_many(ids))
+    assert [item['id'] for item in items] == ids
+    assert all(len(call) <= 50 for call in youtube.calls)
+    assert sorted(video_id for call in youtube.calls for video_id in call) == sorted(ids)
+    assert len(youtube.calls) == 3
+
+def test_cached_items_make_no_api_call():
+    youtube = FakeYouTube()
+    service = _service(youtube)
+    asyncio.run(service.get("a"))
+    item = asyncio.run(service.get("a"))
+
+    assert item['id'] == "a"
+    assert len(youtube.calls) == 1
+    assert service.stats()['cache_hits'] == 1
+
+def test_expired_items_are_fetched_again():
+    youtube = FakeYouTube()
+    service = _service(youtube, ttl=-1)
+    asyncio.run(service.get("a"))
+    asyncio.run(service.get("a"))
+    assert len(youtube.calls) == 2
+
+def test_unknown_video_fails_only_its_own_lookup():
+    youtube = FakeYouTube(missing={"gone"})
+    service = _service(youtube)
+
+    async def lookups():
+        return await asyncio.gather(service.get("a"), service.get("gone"), return_exceptions=True)
+
+    found, missing = asyncio.run(lookups())
+    assert found['id'] == "a"
+    assert isinstance(missing, ValueError)
+    assert len(youtube.calls) == 1
@@ -0,0 +1,184 @@
+import os
+import json
+import time
+import threading
+import contextvars
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from config import TRACING_ENABLED, TRACE_EXPORT_PATH
+
+_enabled = contextvars.ContextVar("askit_tracing", default=TRACING_ENABLED)
+_current = contextvars.ContextVar("askit_trace", default=None)
+_recent = deque(maxlen=100)
+_totals = {}  # (trace name, stage) -> [seconds, count]
+_lock = threading.Lock()
+
+class Trace:
+    """Per-request record of time spent in each pipeline stage"""
+    def __init__(self, name, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.timestamp = time.time()
+        self.started = time.perf_counter()
+        self.duration = None
+        self.stages = OrderedDict()  # stage -> {"seconds": float, "count": int}
+        self._open = []  # time spent in stages nested inside each open span, for exclusive stage times
+
+    def add(self, stage, seconds, count=1):
+        """Add time to a stage; repeated stages (e.g. one per batch) accumulate"""
+        entry = self.stages.setdefault(stage, {"seconds": 0.0, "count": 0})
+        entry["seconds"] += seconds
+        entry["count"] += count
+
+    def finish(self):
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self.started
+        with _lock:
+            _recent.append(self)
+            for stage, entry in list(self.stages.items()) + [("total", {"seconds": self.duration, "count": 1})]:
+                total = _totals.setdefault((self.name, stage), [0.0, 0])
+                total[0] += entry["seconds"]
+                total[1] += entry["count"]
+        if TRACE_EXPORT_PATH:
+            _export(self)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "timestamp": self.timestamp,
+            "duration": self.duration,
+            "attrs": self.attrs,
+            "stages": dict(self.stages)
+        }
+
+class _NullSpan:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+def enable(enabled=True):
+    """Turn tracing on or off for the current context (e.g. one Streamlit script run)
+
+    Other threads and requests keep the TRACING_ENABLED default.
+    """
+    _enabled.set(enabled)
+
+def is_enabled():
+    return _enabled.get()
+
+def current_trace():
+    return _current.get() if _enabled.get() else None
+
+def start_trace(name, **attrs):
+    """Start a trace that the caller finishes explicitly (e.g. after a stream ends)"""
+    return Trace(name, **attrs) if _enabled.get() else None
+
+@contextmanager
+def _trace(name, attrs):
+    trace = Trace(name, **attrs)
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+        trace.finish()
+
+def trace(name, **attrs):
+    """Context manager recording one request; yields the Trace, or None when disabled"""
+    if not _enabled.get():
+        return _NULL_SPAN
+    return _trace(name, attrs)
+
+def _record(trace, stage, elapsed, child, count=1):
+    # Time spent in nested stages is reported there, not here
+    trace.add(stage, elapsed - child, count)
+    if trace._open:
+        trace._open[-1] += elapsed
+
+@contextmanager
+def _span(trace, stage):
+    stack = trace._open
+    stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        yield trace
+    finally:
+        elapsed = time.perf_counter() - start
+        _record(trace, stage, elapsed, stack.pop())
+
+def span(stage, trace=None):
+    """Time a block as one stage of the current (or given) trace"""
+    trace = trace or current_trace()
+    if trace is None:
+        return _NULL_SPAN
+    return _span(trace, stage)
+
+def traced_iter(stage, iterable, trace=None):
+    """Wrap an iterator so the time spent producing items counts towards a stage"""
+    trace = trace or current_trace()
+    if trace is None:
+        return iterable
+    return _traced_iter(trace, stage, iterable)
+
+def _traced_iter(trace, stage, iterable):
+    iterator = iter(iterable)
+    stack = trace._open
+    while True:
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            _record(trace, stage, time.perf_counter() - start, stack.pop(), count=0)
+            return
+        except BaseException:
+            stack.pop()
+            raise
+        _record(trace, stage, time.perf_counter() - start, stack.pop())
+        yield item
+
+def recent_traces(name=None):
+    """Finished traces, newest last"""
+    with _lock:
+        return [t for t in _recent if name is None or t.name == name]
+
+def stage_totals():
+    """Cumulative seconds and counts per (trace name, stage) since start-up"""
+    with _lock:
+        return {key: tuple(value) for key, value in _totals.items()}
+
+def export_json(path, traces=None):
+    """Append traces as JSON lines"""
+    with open(path, "a", encoding="utf-8") as f:
+        for trace in traces if traces is not None else recent_traces():
+            f.write(json.dumps(trace.to_dict()) + "\n")
+
+def export_openmetrics(path):
+    """Write cumulative stage timings in OpenMetrics text format"""
+    lines = [
+        "# TYPE askit_stage_seconds summary",
+        "# UNIT askit_stage_seconds seconds",
+        "# HELP askit_stage_seconds Time spent in each pipeline stage."
+    ]
+    for (name, stage), (seconds, count) in sorted(stage_totals().items()):
+        labels = f'trace="{name}",stage="{stage}"'
+        lines.append(f"askit_stage_seconds_sum{{{labels}}} {seconds:.6f}")
+        lines.append(f"askit_stage_seconds_count{{{labels}}} {count}")
+    lines.append("# EOF")
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(path + ".tmp", path)
+
+def _export(trace):
+    try:
+        if TRACE_EXPORT_PATH.endswith(".json"):
+            export_json(TRACE_EXPORT_PATH, [trace])
+        else:
+            export_openmetrics(TRACE_EXPORT_PATH)
+    except OSError:
+        pass
@@ -1,42 +1,53 @@
+import os
 import string
 import re
 from collections import Counter
-from nltk.translate.bleu_score import sentence_bleu, SmoothingFunction
-from rouge_score import rouge_scorer
-import nltk
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from config import NLTK_DATA_DIR
 
-# Download required NLTK data
-nltk.download('punkt', quiet=True)
+_ARTICLES = re.compile(r'\b(a|an|the)\b')
+_PUNCTUATION = str.maketrans('', '', string.punctuation)
+_ROUGE_TYPES = ['rouge1', 'rouge2', 'rougeL']
+
+@lru_cache(maxsize=None)
+def _scorers():
+    """Import the scoring libraries on first use and build the shared scorer objects
+
+    Scorer objects are stateless between calls, so one set is shared per
+    process. None of the metrics need downloadable NLTK data; a local data
+    directory is still registered for anything that looks it up.
+    """
+    import nltk
+    from nltk.translate.bleu_score import sentence_bleu, SmoothingFunction
+    from rouge_score import rouge_scorer
+    if os.path.isdir(NLTK_DATA_DIR) and NLTK_DATA_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, os.path.abspath(NLTK_DATA_DIR))
+    return rouge_scorer, rouge_scorer.RougeScorer(_ROUGE_TYPES, use_stemmer=True), sentence_bleu, SmoothingFunction().method1
+
+EMPTY_METRICS = {
+    'f1': 0.0,
+    'exact_match': 0.0,
+    'bleu': 0.0,
+    'rouge': {'rouge1': 0.0, 'rouge2': 0.0, 'rougeL': 0.0}
+}
 
 def normalize_answer(s):
     """Normalize the answer text for metrics calculation"""
-    def remove_articles(text):
-        return re.sub(r'\b(a|an|the)\b', ' ', text)
-    def white_space_fix(text):
-        return ' '.join(text.split())
-    def remove_punc(text):
-        exclude = set(string.punctuation)
-        return ''.join(ch for ch in text if ch not in exclude)
-    def lower(text):
-        return text.lower()
-    return white_space_fix(remove_articles(remove_punc(lower(s))))
+    return ' '.join(_ARTICLES.sub(' ', s.lower().translate(_PUNCTUATION)).split())
+
+def _prepare(text):
+    """Normalize and tokenize a text once for every metric"""
+    norm = normalize_answer(text)
+    # Stemmed ROUGE tokens are computed here so scoring only counts n-grams
+    # (uses the rouge-score 0.1.2 tokenizer that RougeScorer.score applies internally)
+    return norm, norm.split(), _scorers()[1]._tokenizer.tokenize(norm)
+
+def _score_prepared(pred, truth):
+    norm_pred, pred_tokens, pred_rouge_tokens = pred
+    norm_truth, truth_tokens, truth_rouge_tokens = truth
+    rouge_scorer, _, sentence_bleu, smoother = _scorers()
 
-def calculate_metrics(prediction, ground_truth):
-    """Calculate various NLP metrics between prediction and ground truth"""
-    if not prediction or not ground_truth:
-        return {
-            'f1': 0.0,
-            'exact_match': 0.0,
-            'bleu': 0.0,
-            'rouge': {'rouge1': 0.0, 'rouge2': 0.0, 'rougeL': 0.0}
-        }
-    
-    norm_pred = normalize_answer(prediction)
-    norm_truth = normalize_answer(ground_truth)
-    
-    pred_tokens = norm_pred.split()
-    truth_tokens = norm_truth.split()
-    
     common = Counter(pred_tokens) & Counter(truth_tokens)
     num_same = sum(common.values())
     
@@ -50,20 +61,72 @@ def calculate_metrics(prediction, ground_truth):
     exact_match = float(norm_pred == norm_truth)
     
     try:
-        smoother = SmoothingFunction().method1
         bleu = sentence_bleu([truth_tokens], pred_tokens, smoothing_function=smoother)
     except:
         bleu = 0.0
     
     try:
-        scorer = rouge_scorer.RougeScorer(['rouge1', 'rouge2', 'rougeL'], use_stemmer=True)
-        rouge_scores = scorer.score(norm_truth, norm_pred)
         rouge = {
-            'rouge1': rouge_scores['rouge1'].fmeasure,
-            'rouge2': rouge_scores['rouge2'].fmeasure,
-            'rougeL': rouge_scores['rougeL'].fmeasure
+            'rouge1': rouge_scorer._score_ngrams(
+                rouge_scorer._create_ngrams(truth_rouge_tokens, 1), rouge_scorer._create_ngrams(pred_rouge_tokens, 1)
+            ).fmeasure,
+            'rouge2': rouge_scorer._score_ngrams(
+                rouge_scorer._create_ngrams(truth_rouge_tokens, 2), rouge_scorer._create_ngrams(pred_rouge_tokens, 2)
+            ).fmeasure,
+            'rougeL': rouge_scorer._score_lcs(truth_rouge_tokens, pred_rouge_tokens).fmeasure
         }
     except:
         rouge = {'rouge1': 0.0, 'rouge2': 0.0, 'rougeL': 0.0}
     
-    return {'f1': f1, 'exact_match': exact_match, 'bleu': bleu, 'rouge': rouge}
\ No newline at end of file
+    return {'f1': f1, 'exact_match': exact_match, 'bleu': bleu, 'rouge': rouge}
+
+def calculate_metrics(prediction, ground_truth):
+    """Calculate various NLP metrics between prediction and ground truth"""
+    if not prediction or not ground_truth:
+        return {**EMPTY_METRICS, 'rouge': dict(EMPTY_METRICS['rouge'])}
+    return _score_prepared(_prepare(prediction), _prepare(ground_truth))
+
+def _score_chunk(pairs):
+    cache = {}
+    def prepared(text):
+        if text not in cache:
+            cache[text] = _prepare(text)
+        return cache[text]
+    results = []
+    for prediction, reference in pairs:
+        if not prediction or not reference:
+            results.append({**EMPTY_METRICS, 'rouge': dict(EMPTY_METRICS['rouge'])})
+        else:
+            results.append(_score_prepared(prepared(prediction), prepared(reference)))
+    return results
+
+def calculate_metrics_batch(predictions, references, processes=None, chunk_size=500):
+    """Score many prediction/reference pairs
+
+    Each distinct text is normalized and tokenized once and the scorer
+    objects are reused. With processes > 1 the pairs are split into chunks
+    scored in a process pool. Returns one metrics dict per pair, in order,
+    plus the averages under 'mean'.
+    """
+    pairs = list(zip(predictions, references))
+    if len(pairs) != len(predictions) or len(pairs) != len(references):
+        raise ValueError("predictions and references must have the same length")
+    if processes and processes > 1 and len(pairs) > chunk_size:
+        chunks = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = [metrics for chunk in executor.map(_score_chunk, chunks) for metrics in chunk]
+    else:
+        results = _score_chunk(pairs)
+    return {'pairs': results, 'mean': mean_metrics(results)}
+
+def mean_metrics(results):
+    """Average a list of metrics dicts"""
+    if not results:
+        return {**EMPTY_METRICS, 'rouge': dict(EMPTY_METRICS['rouge'])}
+    n = len(results)
+    return {
+        'f1': sum(r['f1'] for r in results) / n,
+        'exact_match': sum(r['exact_match'] for r in results) / n,
+        'bleu': sum(r['bleu'] for r in results) / n,
+        'rouge': {key: sum(r['rouge'][key] for r in results) / n for key in _ROUGE_TYPES}
+    }
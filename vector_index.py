@@ -0,0 +1,194 @@
+import math
+import time
+import argparse
+import numpy as np
+from config import INDEX_TRAIN_SAMPLE, INDEX_NPROBE, INDEX_EF_SEARCH
+
+INDEX_MODES = ("flat", "ivf", "hnsw", "ivfpq")
+
+# Corpus sizes (in vectors) at which automatic selection moves to the next backend
+AUTO_THRESHOLDS = (
+    (20_000, "flat"),
+    (500_000, "hnsw"),
+    (2_000_000, "ivf"),
+)
+
+def choose_index_mode(n_vectors):
+    """Pick an index backend from the number of vectors it will hold"""
+    for limit, mode in AUTO_THRESHOLDS:
+        if n_vectors < limit:
+            return mode
+    return "ivfpq"
+
+# Fewest vectors worth training a quantizer on; smaller corpora stay exact
+MIN_TRAIN_VECTORS = {"ivf": 1_000, "ivfpq": 10_000}
+
+def resolve_index_mode(mode, n_vectors):
+    """Turn a configured mode (possibly "auto") into the backend to build now"""
+    if mode == "auto":
+        return choose_index_mode(n_vectors)
+    if n_vectors < MIN_TRAIN_VECTORS.get(mode, 0):
+        return "flat"
+    return mode
+
+def _nlist(n_vectors, sample_size=INDEX_TRAIN_SAMPLE):
+    # Roughly 4*sqrt(n) lists, keeping at least 39 points per centroid in the
+    # training sample (train_index never sees more than sample_size vectors)
+    trained = min(n_vectors, sample_size)
+    return max(1, min(int(4 * math.sqrt(max(n_vectors, 1))), trained // 39, 65536))
+
+def _pq_subquantizers(dimension):
+    return max(m for m in range(1, min(dimension, 64) + 1) if dimension % m == 0)
+
+def build_index(dimension, mode, n_vectors=0, metric="ip"):
+    """Create an empty index that accepts add_with_ids and, if needed, training
+
+    Vectors are expected to be L2-normalised so inner product equals cosine
+    similarity. IVF indexes keep ids natively; flat and HNSW are wrapped in
+    an IndexIDMap2.
+    """
+    import faiss
+    faiss_metric = faiss.METRIC_INNER_PRODUCT if metric == "ip" else faiss.METRIC_L2
+    if mode == "flat":
+        base = faiss.IndexFlatIP(dimension) if metric == "ip" else faiss.IndexFlatL2(dimension)
+        return faiss.IndexIDMap2(base)
+    if mode == "hnsw":
+        base = faiss.IndexHNSWFlat(dimension, 32, faiss_metric)
+        base.hnsw.efConstruction = 80
+        return faiss.IndexIDMap2(base)
+    quantizer = faiss.IndexFlatIP(dimension) if metric == "ip" else faiss.IndexFlatL2(dimension)
+    if mode == "ivf":
+        index = faiss.IndexIVFFlat(quantizer, dimension, _nlist(n_vectors), faiss_metric)
+    elif mode == "ivfpq":
+        index = faiss.IndexIVFPQ(quantizer, dimension, _nlist(n_vectors), _pq_subquantizers(dimension), 8, faiss_metric)
+    else:
+        raise ValueError(f"Unsupported index mode: {mode}")
+    return index
+
+def train_index(index, vectors, sample_size=INDEX_TRAIN_SAMPLE):
+    """Train an index on a random sample of the vectors if it needs training"""
+    if index.is_trained or len(vectors) == 0:
+        return
+    if len(vectors) > sample_size:
+        rows = np.random.default_rng(0).choice(len(vectors), sample_size, replace=False)
+        vectors = vectors[np.sort(rows)]
+    index.train(np.ascontiguousarray(vectors, dtype=np.float32))
+
+def set_search_params(index, nprobe=INDEX_NPROBE, ef_search=INDEX_EF_SEARCH):
+    """Apply query-time knobs to an index, ignoring ones it does not have"""
+    import faiss
+    params = faiss.ParameterSpace()
+    for name, value in (("nprobe", nprobe), ("efSearch", ef_search)):
+        if value is None:
+            continue
+        try:
+            params.set_index_parameter(index, name, value)
+        except RuntimeError:
+            pass
+
+def index_contents(index):
+    """Return (ids, vectors) stored in an index built by build_index
+
+    For IVF-PQ the vectors are the lossy reconstructions of the codes.
+    """
+    import faiss
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexIDMap2):
+        ids = faiss.vector_to_array(index.id_map).astype(np.int64)
+        if not len(ids):
+            return ids, np.empty((0, index.d), dtype=np.float32)
+        return ids, index.index.reconstruct_n(0, index.ntotal)
+    ivf = faiss.extract_index_ivf(index)
+    invlists = ivf.invlists
+    ids = np.concatenate([
+        faiss.rev_swig_ptr(invlists.get_ids(l), invlists.list_size(l)).copy()
+        for l in range(ivf.nlist) if invlists.list_size(l)
+    ] + [np.empty(0, dtype=np.int64)]).astype(np.int64)
+    if not len(ids):
+        return ids, np.empty((0, ivf.d), dtype=np.float32)
+    ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+    return ids, ivf.reconstruct_batch(ids)
+
+def remove_from_index(index, ids):
+    """Remove ids from an index, returning the index to keep using
+
+    HNSW cannot delete in place, so its remaining vectors are copied into a
+    freshly built graph instead.
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    try:
+        index.remove_ids(ids)
+        return index
+    except RuntimeError:
+        all_ids, vectors = index_contents(index)
+        keep = ~np.isin(all_ids, ids)
+        rebuilt = build_index(index.d, "hnsw", int(keep.sum()), metric=index_metric(index))
+        if keep.any():
+            rebuilt.add_with_ids(vectors[keep], all_ids[keep])
+        return rebuilt
+
+def index_metric(index):
+    import faiss
+    return "ip" if index.metric_type == faiss.METRIC_INNER_PRODUCT else "l2"
+
+def recall_latency_report(vectors, queries, k=10, modes=INDEX_MODES, nprobes=(1, 4, 16, 64), ef_searches=(16, 64, 256)):
+    """Measure recall@k and per-query latency of each backend against exact search
+
+    Returns one dict per (mode, setting) with build seconds, milliseconds per
+    query and recall relative to the flat baseline.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    ids = np.arange(len(vectors), dtype=np.int64)
+    k = min(k, len(vectors))
+
+    flat = build_index(vectors.shape[1], "flat")
+    flat.add_with_ids(vectors, ids)
+    start = time.perf_counter()
+    _, truth = flat.search(queries, k)
+    flat_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    rows = [{'mode': 'flat', 'setting': '', 'build_seconds': 0.0, 'ms_per_query': flat_ms, 'recall': 1.0}]
+    for mode in modes:
+        if mode == "flat":
+            continue
+        start = time.perf_counter()
+        index = build_index(vectors.shape[1], mode, len(vectors))
+        try:
+            train_index(index, vectors)
+        except RuntimeError:
+            # Too few vectors to train this backend
+            continue
+        index.add_with_ids(vectors, ids)
+        build_seconds = time.perf_counter() - start
+        settings = [("efSearch", v) for v in ef_searches] if mode == "hnsw" else [("nprobe", v) for v in nprobes]
+        for name, value in settings:
+            set_search_params(index, **{"ef_search" if name == "efSearch" else "nprobe": value})
+            start = time.perf_counter()
+            _, found = index.search(queries, k)
+            ms = (time.perf_counter() - start) * 1000 / len(queries)
+            recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+            rows.append({'mode': mode, 'setting': f"{name}={value}", 'build_seconds': build_seconds, 'ms_per_query': ms, 'recall': float(recall)})
+    return rows
+
+def format_report(rows):
+    """Render report rows as a fixed-width text table"""
+    lines = [f"{'mode':<7}{'setting':<16}{'build s':>9}{'ms/query':>10}{'recall':>8}"]
+    for row in rows:
+        lines.append(f"{row['mode']:<7}{row['setting']:<16}{row['build_seconds']:>9.2f}{row['ms_per_query']:>10.3f}{row['recall']:>8.3f}")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    from corpus_store import get_corpus_store
+
+    parser = argparse.ArgumentParser(description="Recall vs latency report for a stored corpus")
+    parser.add_argument("corpus", help="Name of the corpus to sample vectors from")
+    parser.add_argument("--queries", type=int, default=200, help="Number of stored vectors used as queries")
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    corpus = get_corpus_store().open(args.corpus)
+    _, vectors = corpus.vectors()
+    rng = np.random.default_rng(0)
+    queries = vectors[rng.choice(len(vectors), min(args.queries, len(vectors)), replace=False)]
+    print(format_report(recall_latency_report(vectors, queries, k=args.k)))
@@ -0,0 +1,113 @@
+import time
+import asyncio
+import threading
+from config import YOUTUBE_METADATA_TTL, YOUTUBE_BATCH_WINDOW
+
+# videos().list accepts at most 50 ids per call
+MAX_BATCH = 50
+
+class VideoMetadataService:
+    """Async, cached and batched access to YouTube video snippets
+
+    Lookups arriving within a short window are coalesced into one
+    videos().list call of up to 50 ids, which runs in a worker thread so the
+    event loop is never blocked. Snippets are cached for a TTL.
+    """
+    def __init__(self, youtube_api_key=None, youtube=None, ttl=YOUTUBE_METADATA_TTL, batch_window=YOUTUBE_BATCH_WINDOW):
+        self._youtube_api_key = youtube_api_key
+        self._youtube = youtube
+        self._build_lock = threading.Lock()
+        self.ttl = ttl
+        self.batch_window = batch_window
+        self._cache = {}     # video id -> (expires at, item)
+        self._pending = {}   # video id -> future awaiting the next batch
+        self._flush_handle = None
+        self.api_calls = 0
+        self.cache_hits = 0
+
+    @property
+    def youtube(self):
+        """The discovery client, built on first API call"""
+        if self._youtube is None:
+            with self._build_lock:
+                if self._youtube is None:
+                    from googleapiclient.discovery import build
+                    self._youtube = build('youtube', 'v3', developerKey=self._youtube_api_key)
+        return self._youtube
+
+    def _cached(self, video_id):
+        entry = self._cache.get(video_id)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._cache[video_id]
+            return None
+        return entry[1]
+
+    async def get(self, video_id):
+        """Return the videos().list item for one id"""
+        item = self._cached(video_id)
+        if item is not None:
+            self.cache_hits += 1
+            return item
+        future = self._pending.get(video_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[video_id] = future
+            if len(self._pending) >= MAX_BATCH:
+                self._schedule_flush(loop, 0)
+            elif self._flush_handle is None:
+                self._schedule_flush(loop, self.batch_window)
+        return await asyncio.shield(future)
+
+    async def get_many(self, video_ids):
+        """Return items for several ids, batched into as few API calls as possible"""
+        return await asyncio.gather(*(self.get(video_id) for video_id in video_ids))
+
+    def _schedule_flush(self, loop, delay):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        self._flush_handle = loop.call_later(delay, lambda: asyncio.ensure_future(self._flush()))
+
+    async def _flush(self):
+        self._flush_handle = None
+        while self._pending:
+            ids = list(self._pending)[:MAX_BATCH]
+            futures = {video_id: self._pending.pop(video_id) for video_id in ids}
+            try:
+                items = await asyncio.to_thread(self._fetch, ids)
+            except Exception as e:
+                for future in futures.values():
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            expires = time.monotonic() + self.ttl
+            for video_id, future in futures.items():
+                item = items.get(video_id)
+                if item is None:
+                    future.set_exception(ValueError(f"No video found with ID: {video_id}"))
+                else:
+                    self._cache[video_id] = (expires, item)
+                    future.set_result(item)
+
+    def _fetch(self, ids):
+        # Blocking googleapiclient call; runs in a worker thread
+        self.api_calls += 1
+        response = self.youtube.videos().list(part="snippet", id=",".join(ids), maxResults=MAX_BATCH).execute()
+        return {item['id']: item for item in response.get('items', [])}
+
+    def stats(self):
+        return {'api_calls': self.api_calls, 'cache_hits': self.cache_hits, 'cached_videos': len(self._cache)}
+
+_services = {}
+_services_lock = threading.Lock()
+
+def get_metadata_service(youtube_api_key):
+    """Return the process-wide metadata service for an API key"""
+    with _services_lock:
+        service = _services.get(youtube_api_key)
+        if service is None:
+            service = VideoMetadataService(youtube_api_key)
+            _services[youtube_api_key] = service
+        return service
@@ -1,77 +1,98 @@
 import re
-import httpx
 from typing import Optional, Dict
 from datetime import datetime, timezone
-from googleapiclient.discovery import build
 import asyncio
+import time
+import async_runtime
+import tracing
+from tracing import span
+from youtube_metadata import get_metadata_service
+from streaming import AsyncAnswerStream
+from llm_scheduler import get_scheduler
+
+_VIDEO_ID_PATTERNS = [
+    re.compile(r'(?:v=|\/)([0-9A-Za-z_-]{11}).*'),
+    re.compile(r'(?:embed\/)([0-9A-Za-z_-]{11})'),
+    re.compile(r'(?:youtu\.be\/)([0-9A-Za-z_-]{11})')
+]
 
 class YouTubeQASystem:
     """System for answering questions about YouTube videos"""
-    def __init__(self, youtube_api_key: str, openrouter_api_key: str):
-        self.youtube = build('youtube', 'v3', developerKey=youtube_api_key)
+    def __init__(self, youtube_api_key: str, openrouter_api_key: str, metadata_service=None):
+        self.metadata = metadata_service or get_metadata_service(youtube_api_key)
         self.openrouter_api_key = openrouter_api_key
+        self.scheduler = get_scheduler(openrouter_api_key)
         self.model_name = "mistralai/mistral-7b-instruct:free via OpenRouter"
 
-    def extract_video_id(self, url: str) -> Optional[str]:
+    @staticmethod
+    def extract_video_id(url: str) -> Optional[str]:
         """Extract YouTube video ID from various URL formats"""
-        patterns = [
-            r'(?:v=|\/)([0-9A-Za-z_-]{11}).*',
-            r'(?:embed\/)([0-9A-Za-z_-]{11})',
-            r'(?:youtu\.be\/)([0-9A-Za-z_-]{11})'
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, url)
+        for pattern in _VIDEO_ID_PATTERNS:
+            match = pattern.search(url)
             if match:
                 return match.group(1)
         return None
 
     async def get_video_info(self, video_id: str) -> Dict:
         """Get video metadata from YouTube API"""
-        request = self.youtube.videos().list(part="snippet", id=video_id)
-        response = request.execute()
-        if not response.get('items'):
-            raise ValueError(f"No video found with ID: {video_id}")
-        return response['items'][0]
+        # The shared service lives on the background loop so lookups from
+        # concurrent sessions are cached and batched together
+        return await async_runtime.run_async(self.metadata.get(video_id))
+
+    @property
+    def youtube(self):
+        return self.metadata.youtube
         
+    def _messages(self, video_info, question):
+        """Build the chat messages for a question about a video"""
+        return [
+            {
+                "role": "system", 
+                "content": "You are an AI assistant that provides concise answers to questions about YouTube videos based on their titles and descriptions."
+            },
+            {
+                "role": "user", 
+                "content": f"Video Title: {video_info['snippet']['title']}\nDescription: {video_info['snippet']['description']}\nQuestion: {question}"
+            }
+        ]
+
     async def process_video_with_openrouter(self, video_info, question):
         """Process video information and question using OpenRouter API"""
-        headers = {
-            "Authorization": f"Bearer {self.openrouter_api_key}",
-            "HTTP-Referer": "https://askit-app.streamlit.app",
-            "X-Title": "AskIt YouTube QA"
-        }
-        
-        payload = {
-            "model": "mistralai/mistral-7b-instruct:free",
-            "messages": [
-                {
-                    "role": "system", 
-                    "content": "You are an AI assistant that provides concise answers to questions about YouTube videos based on their titles and descriptions."
-                },
-                {
-                    "role": "user", 
-                    "content": f"Video Title: {video_info['snippet']['title']}\nDescription: {video_info['snippet']['description']}\nQuestion: {question}"
-                }
-            ],
-            "max_tokens": 1000,
-            "temperature": 0.7
-        }
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=60.0
-            )
-            
-            if response.status_code != 200:
-                raise ValueError(f"OpenRouter API Error: {response.text}")
-            
-            result = response.json()
-            answer = result["choices"][0]["message"]["content"]
-            
-            return answer
+        return await self.scheduler.complete(self._messages(video_info, question), max_tokens=1000, temperature=0.7)
+
+    async def stream_video_with_openrouter(self, video_info, question):
+        """Yield answer tokens from OpenRouter as they arrive"""
+        async for token in self.scheduler.astream(self._messages(video_info, question), max_tokens=1000, temperature=0.7):
+            yield token
+
+    async def process_video_stream(self, url: str, question: str) -> Dict:
+        """Like process_video, but return the answer as a token stream under 'stream'"""
+        try:
+            video_id = self.extract_video_id(url)
+            if not video_id:
+                raise ValueError("Invalid YouTube URL")
+
+            trace = tracing.start_trace("youtube", streaming=True)
+            with span("metadata", trace):
+                video_info = await self.get_video_info(video_id)
+            llm_started = time.perf_counter()
+
+            def on_complete(stream):
+                if trace is not None:
+                    trace.add("llm", time.perf_counter() - llm_started)
+                    trace.attrs["time_to_first_token"] = stream.time_to_first_token
+                    trace.finish()
+
+            stream = AsyncAnswerStream(self.stream_video_with_openrouter(video_info, question), on_complete=on_complete)
+            stream.trace = trace
+            return {
+                "stream": stream,
+                "video_title": video_info['snippet']['title'],
+                "timestamp": datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+                "thumbnail": video_info['snippet']['thumbnails']['high']['url'] if 'high' in video_info['snippet']['thumbnails'] else None
+            }
+        except Exception as e:
+            return {"error": str(e)}
 
     async def process_video(self, url: str, question: str) -> Dict[str, str]:
         """Process YouTube video URL and answer a question about it"""
@@ -80,9 +101,12 @@ class YouTubeQASystem:
             if not video_id:
                 raise ValueError("Invalid YouTube URL")
 
-            video_info = await self.get_video_info(video_id)
-            answer = await self.process_video_with_openrouter(video_info, question)
-                
+            with tracing.trace("youtube"):
+                with span("metadata"):
+                    video_info = await self.get_video_info(video_id)
+                with span("llm"):
+                    answer = await self.process_video_with_openrouter(video_info, question)
+
             return {
                 "answer": answer,
                 "video_title": video_info['snippet']['title'],